@@ -246,8 +246,20 @@ FROM SF1PLUS_DB.RAW_DATA.TF1_VIEWING_LOGS_HIGH_VOLUME
 GROUP BY viewing_date, viewing_hour, day_of_week
 ORDER BY viewing_date DESC, viewing_hour;
 
--- Device Preferences Analytics
-CREATE OR REPLACE VIEW DEVICE_ANALYTICS AS
+-- Device Preferences Analytics (Materialized for Performance: the dashboard reads it
+-- on every overview and devices render; rebuilt with the rest of the GOLD layer)
+-- Earlier deployments created DEVICE_ANALYTICS as a view, which CREATE OR REPLACE TABLE
+-- cannot replace; drop it only while it is still a view so reruns keep working
+EXECUTE IMMEDIATE $$
+BEGIN
+    IF (EXISTS (SELECT 1 FROM INFORMATION_SCHEMA.VIEWS
+                WHERE TABLE_SCHEMA = 'GOLD' AND TABLE_NAME = 'DEVICE_ANALYTICS')) THEN
+        DROP VIEW IF EXISTS DEVICE_ANALYTICS;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE TABLE DEVICE_ANALYTICS AS
 SELECT 
     device_type,
     os_name,
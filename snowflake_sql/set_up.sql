@@ -11,12 +11,19 @@ CREATE OR REPLACE STAGE CODE_STAGE
 -- Verify stage
 SHOW STAGES;
 
--- 3) Upload the Python file to the stage (run in SnowSQL or a client that supports PUT)
+-- 3) Upload the Python files to the stage (run in SnowSQL or a client that supports PUT)
 -- If using SnowSQL on your Mac, this absolute path should work:
 -- Replace account/region/role/warehouse context as needed before running PUT.
+-- The generator imports the shared sf1plus_sql / sf1plus_staging helper modules.
 PUT file:///Users/edendulk/code/sf1plus/snowpark/sf1plus_crm_generator.py
   @SF1PLUS_DB.BRONZE.CODE_STAGE
   AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
+PUT file:///Users/edendulk/code/sf1plus/snowpark/sf1plus_sql.py
+  @SF1PLUS_DB.BRONZE.CODE_STAGE
+  AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
+PUT file:///Users/edendulk/code/sf1plus/snowpark/sf1plus_staging.py
+  @SF1PLUS_DB.BRONZE.CODE_STAGE
+  AUTO_COMPRESS=FALSE OVERWRITE=TRUE;
 
 -- Verify file landed
 LIST @SF1PLUS_DB.BRONZE.CODE_STAGE;
@@ -38,8 +45,12 @@ RETURNS TABLE (
 )
 LANGUAGE PYTHON
 RUNTIME_VERSION = '3.10'
-PACKAGES = ('snowflake-snowpark-python', 'pandas')
-IMPORTS = ('@SF1PLUS_DB.BRONZE.CODE_STAGE/sf1plus_crm_generator.py')
+PACKAGES = ('snowflake-snowpark-python', 'pandas', 'numpy', 'pyarrow')
+IMPORTS = (
+  '@SF1PLUS_DB.BRONZE.CODE_STAGE/sf1plus_crm_generator.py',
+  '@SF1PLUS_DB.BRONZE.CODE_STAGE/sf1plus_sql.py',
+  '@SF1PLUS_DB.BRONZE.CODE_STAGE/sf1plus_staging.py'
+)
 HANDLER = 'sf1plus_crm_generator.sp_entry';
 
 CALL SF1PLUS_DB.RAW_DATA.GENERATE_SF1PLUS_CRM(4000000, TRUE);
@@ -5,15 +5,26 @@ Generates a synthetic TV streaming CRM with 4,000,000 rows, French localization,
 and 25% overlap with CROCEVIA_DB.RAW_DATA.CROCEVIA_CRM using deterministic rules
 and controlled data messiness (missing fields, minor mutations, duplicates).
 
+Rows are synthesized locally with NumPy/Arrow, written as a single Parquet file
+and PUT to an internal stage; one CTAS then reads the staged file and fills the
+overlap rows from the CROCEVIA source in the same statement.
+
 This module is designed to run inside Snowflake as a stored procedure import.
 The main entrypoint is the function `run(session, target_rows, overwrite)`.
 """
 
 from typing import Optional
-import uuid
+from datetime import date
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 
 from snowflake.snowpark import Session
 
+from sf1plus_sql import exec_async, exec_batch, exec_sql, script_block
+from sf1plus_staging import lookup, stage_parquet, to_str
+
 
 # Configuration (schemas align to user's standards: stage in BRONZE, tables in RAW_DATA)
 TARGET_DB = "SF1PLUS_DB"
@@ -21,10 +32,142 @@ RAW_SCHEMA = "RAW_DATA"
 BRONZE_SCHEMA = "BRONZE"
 OUTPUT_TABLE = "SF1PLUS_CRM"
 SOURCE_TABLE = "CROCEVIA_DB.RAW_DATA.CROCEVIA_CRM"
+LOAD_STAGE = f"{TARGET_DB}.{BRONZE_SCHEMA}.SF1PLUS_CRM_LOAD"
+LOAD_FILE_FORMAT = f"{TARGET_DB}.{BRONZE_SCHEMA}.SF1PLUS_PARQUET"
+
+CRM_COLUMNS = """(
+    customer_id STRING,
+    email STRING,
+    phone STRING,
+    first_name STRING,
+    last_name STRING,
+    gender STRING,
+    profession STRING,
+    date_joined DATE,
+    subscription_level STRING,
+    overlap_type STRING
+)"""
+
+# Lookup tables indexed by row_id modulo their length
+FIRST_NAMES = [
+    "Jean", "Marie", "Pierre", "Sophie", "Michel", "Catherine", "Philippe", "Nathalie",
+    "Alain", "Isabelle", "François", "Sylvie", "Bernard", "Martine", "Patrick", "Christine",
+    "Daniel", "Françoise", "Thierry", "Monique",
+]
+LAST_NAMES = [
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Petit", "Richard", "Durand",
+    "Leroy", "Moreau", "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David",
+    "Bertrand", "Roux", "Vincent", "Fournier", "Morel", "Girard", "Andre", "Lefevre",
+    "Mercier",
+]
+# Leading "0" + first pair of a French phone number, by row_id % 6
+PHONE_PREFIXES = ["01", "02", "03", "04", "05", "06"]
+EMAIL_DOMAINS = ["gmail.com", "orange.fr", "free.fr", "wanadoo.fr", "sfr.fr", "laposte.net"]
+GENDERS = ["Male", "Female"]
+PROFESSIONS = ["Engineer", "Teacher", "Student", "Nurse", "Sales", "Artist", "Manager", "Consultant"]
+SUBSCRIPTION_LEVELS = ["FREE", "BASIC", "STANDARD", "PREMIUM"]
+
+
+def _generate_rows(
+    base_count: int,
+    dup_count: int,
+    triple_count: int,
+    email_extra_count: int,
+    phone_extra_count: int,
+) -> pa.Table:
+    """
+    Synthesize base + duplicate CRM rows as an Arrow table.
+
+    Overlap rows keep generated names and leave the source-fed email/phone NULL;
+    SRC_K carries their row_id; Snowflake folds it onto the source sample size.
+    """
+    rng = np.random.default_rng()
+
+    t_triple = triple_count
+    t_email = t_triple + email_extra_count
+    t_phone = t_email + phone_extra_count
+
+    base_ids = np.arange(1, base_count + 1, dtype=np.int64)
+
+    # Thresholds are known constants and buckets are contiguous row_id ranges,
+    # so fill them by slice instead of comparing every row
+    overlap_base = np.full(base_count, "NONE", dtype="<U6")
+    overlap_base[:t_triple] = "TRIPLE"
+    overlap_base[t_triple:t_email] = "EMAIL"
+    overlap_base[t_email:t_phone] = "PHONE"
+    email_from_source = np.zeros(base_count, dtype=bool)
+    email_from_source[:t_email] = True
+    phone_from_source = np.zeros(base_count, dtype=bool)
+    phone_from_source[:t_triple] = True
+    phone_from_source[t_email:t_phone] = True
+
+    # Per-base-row random draws; duplicates inherit them from the row they copy
+    phone_digits = rng.integers(10_000_000, 100_000_000, size=base_count)
+    days_ago = rng.integers(0, 3651, size=base_count)
+    # Source-fed values stay NULL until joined to CROCEVIA; others get 15% / 20% missingness
+    email_missing = email_from_source | (rng.random(base_count) < 0.15)
+    phone_missing = phone_from_source | (rng.random(base_count) < 0.20)
+
+    # Duplicates are sampled from non-overlap rows only so the overlap share stays exact
+    none_ids = base_ids[t_phone:]
+    dup_ids = rng.choice(none_ids, size=min(dup_count, none_ids.size), replace=False)
+    n_dups = dup_ids.size
+
+    row_id = np.concatenate([base_ids, dup_ids])
+    src_pos = row_id - 1
+    is_dup = np.arange(row_id.size) >= base_count
+    has_source = np.zeros(row_id.size, dtype=bool)
+    has_source[:min(t_phone, base_count)] = True
+
+    # Slight mutations on duplicates: a digit before '@', a changed last phone digit
+    email_digit = np.full(row_id.size, "", dtype="<U1")
+    mutate_email = rng.random(n_dups) < 0.5
+    email_digit[base_count:][mutate_email] = rng.integers(0, 10, size=int(mutate_email.sum())).astype("U1")
+
+    digits = phone_digits[src_pos]
+    mutate_phone = np.zeros(row_id.size, dtype=bool)
+    mutate_phone[base_count:] = rng.random(n_dups) < 0.5
+    digits = np.where(
+        mutate_phone,
+        digits - digits % 10 + rng.integers(0, 10, size=row_id.size),
+        digits,
+    )
+
+    first_name = lookup(FIRST_NAMES, row_id)
+    last_name = lookup(LAST_NAMES, row_id)
+    email = pc.binary_join_element_wise(
+        pc.utf8_lower(first_name), ".", pc.utf8_lower(last_name),
+        pa.array(email_digit), "@", lookup(EMAIL_DOMAINS, row_id), "",
+    )
+    # One 8-digit draw per row, formatted once and sliced into the four pairs
+    digits = to_str(digits)
+    phone = pc.binary_join_element_wise(
+        lookup(PHONE_PREFIXES, row_id),
+        *(pc.utf8_slice_codeunits(digits, i, i + 2) for i in range(0, 8, 2)),
+        " ",
+    )
 
+    customer_id = pc.binary_join_element_wise(
+        "SF1-",
+        pc.utf8_lpad(to_str(row_id), 10, padding="0"),
+        pa.array(np.where(is_dup, "_DUP", "")),
+        "",
+    )
+    null_str = pa.scalar(None, pa.string())
 
-def _exec(session: Session, sql: str) -> None:
-    session.sql(sql).collect()
+    return pa.table({
+        "CUSTOMER_ID": customer_id,
+        "EMAIL": pc.if_else(pa.array(email_missing[src_pos]), null_str, email),
+        "PHONE": pc.if_else(pa.array(phone_missing[src_pos]), null_str, phone),
+        "FIRST_NAME": first_name,
+        "LAST_NAME": last_name,
+        "GENDER": lookup(GENDERS, row_id),
+        "PROFESSION": lookup(PROFESSIONS, row_id),
+        "DATE_JOINED": pa.array(np.datetime64(date.today(), "D") - days_ago[src_pos]),
+        "SUBSCRIPTION_LEVEL": lookup(SUBSCRIPTION_LEVELS, row_id),
+        "OVERLAP_TYPE": pa.array(np.where(is_dup, "DUPLICATE", overlap_base[src_pos])),
+        "SRC_K": pa.array(row_id, mask=~has_source),
+    })
 
 
 def run(session: Session, target_rows: int = 4_000_000, overwrite: bool = True) -> "Session":
@@ -37,9 +180,15 @@ def run(session: Session, target_rows: int = 4_000_000, overwrite: bool = True)
 
     Returns a Snowpark DataFrame preview (100 rows) for stored procedure TABLE return.
     """
-    # Create DB and schemas
-    _exec(session, f"CREATE DATABASE IF NOT EXISTS {TARGET_DB}")
-    _exec(session, f"CREATE SCHEMA IF NOT EXISTS {TARGET_DB}.{RAW_SCHEMA}")
+    # Create DB, schemas, load stage and file format; submitted without waiting so
+    # the round-trip overlaps with local row generation
+    setup_job = exec_async(session, script_block(
+        f"CREATE DATABASE IF NOT EXISTS {TARGET_DB}",
+        f"CREATE SCHEMA IF NOT EXISTS {TARGET_DB}.{RAW_SCHEMA}",
+        f"CREATE SCHEMA IF NOT EXISTS {TARGET_DB}.{BRONZE_SCHEMA}",
+        f"CREATE STAGE IF NOT EXISTS {LOAD_STAGE}",
+        f"CREATE FILE FORMAT IF NOT EXISTS {LOAD_FILE_FORMAT} TYPE = PARQUET USE_LOGICAL_TYPE = TRUE",
+    ))
 
     # Parameters
     base_count = int(round(target_rows * 0.90))
@@ -56,144 +205,83 @@ def run(session: Session, target_rows: int = 4_000_000, overwrite: bool = True)
     email_extra_count = int(round(overlap_total_target * email_share / sum_share))
     phone_extra_count = overlap_total_target - triple_count - email_extra_count
 
-    # Build final dataset in one CTAS to avoid temporary tables in SP runtime
     full_table = f"{TARGET_DB}.{RAW_SCHEMA}.{OUTPUT_TABLE}"
+
+    # Overlap rows cycle through a fixed-size source sample on row_id.
+    # SAMPLE (n ROWS) returns exactly min(n, eligible rows), so the key range is known up front.
+    count_job = exec_async(
+        session,
+        f"SELECT COUNT(*) FROM {SOURCE_TABLE} WHERE EMAIL IS NOT NULL OR PHONE IS NOT NULL",
+    )
+
+    rows = _generate_rows(base_count, dup_count, triple_count, email_extra_count, phone_extra_count)
+
+    src_count = min(overlap_total_target, count_job.result()[0][0])
+
+    # The stage must exist before the PUT
+    setup_job.result()
+    file_name = stage_parquet(session, rows, LOAD_STAGE, "sf1plus_crm")
+
+    # Single pass: read the staged file and join overlap rows to CROCEVIA, no intermediate table
     select_sql = f"""
-        WITH source_sample AS (
+        WITH src AS (
+            /* The sample is already random, so SRC_RN only needs to be dense */
             SELECT 
                 EMAIL AS SRC_EMAIL,
                 PHONE AS SRC_PHONE,
                 FIRST_NAME AS SRC_FIRST_NAME,
                 LAST_NAME AS SRC_LAST_NAME,
-                ROW_NUMBER() OVER (ORDER BY RANDOM()) AS SRC_RN
-            FROM {SOURCE_TABLE}
-            WHERE EMAIL IS NOT NULL OR PHONE IS NOT NULL
-        ),
-        base_rows AS (
-            SELECT ROW_NUMBER() OVER (ORDER BY SEQ4()) AS row_id
-            FROM TABLE(GENERATOR(ROWCOUNT => {base_count}))
-        ),
-        thresholds AS (
-            SELECT {triple_count} AS t_triple,
-                   {triple_count + email_extra_count} AS t_email,
-                   {triple_count + email_extra_count + phone_extra_count} AS t_phone
-        ),
-        assigned AS (
-            SELECT 
-                b.row_id,
-                CASE 
-                    WHEN b.row_id <= (SELECT t_triple FROM thresholds) THEN 'TRIPLE'
-                    WHEN b.row_id <= (SELECT t_email FROM thresholds) THEN 'EMAIL'
-                    WHEN b.row_id <= (SELECT t_phone FROM thresholds) THEN 'PHONE'
-                    ELSE 'NONE'
-                END AS overlap_type,
-                CASE (b.row_id % 20)
-                    WHEN 0 THEN 'Jean' WHEN 1 THEN 'Marie' WHEN 2 THEN 'Pierre' WHEN 3 THEN 'Sophie'
-                    WHEN 4 THEN 'Michel' WHEN 5 THEN 'Catherine' WHEN 6 THEN 'Philippe' WHEN 7 THEN 'Nathalie'
-                    WHEN 8 THEN 'Alain' WHEN 9 THEN 'Isabelle' WHEN 10 THEN 'François' WHEN 11 THEN 'Sylvie'
-                    WHEN 12 THEN 'Bernard' WHEN 13 THEN 'Martine' WHEN 14 THEN 'Patrick' WHEN 15 THEN 'Christine'
-                    WHEN 16 THEN 'Daniel' WHEN 17 THEN 'Françoise' WHEN 18 THEN 'Thierry' ELSE 'Monique'
-                END AS gen_first_name,
-                CASE (b.row_id % 25)
-                    WHEN 0 THEN 'Martin' WHEN 1 THEN 'Bernard' WHEN 2 THEN 'Dubois' WHEN 3 THEN 'Thomas'
-                    WHEN 4 THEN 'Robert' WHEN 5 THEN 'Petit' WHEN 6 THEN 'Richard' WHEN 7 THEN 'Durand'
-                    WHEN 8 THEN 'Leroy' WHEN 9 THEN 'Moreau' WHEN 10 THEN 'Simon' WHEN 11 THEN 'Laurent'
-                    WHEN 12 THEN 'Lefebvre' WHEN 13 THEN 'Michel' WHEN 14 THEN 'Garcia' WHEN 15 THEN 'David'
-                    WHEN 16 THEN 'Bertrand' WHEN 17 THEN 'Roux' WHEN 18 THEN 'Vincent' WHEN 19 THEN 'Fournier'
-                    WHEN 20 THEN 'Morel' WHEN 21 THEN 'Girard' WHEN 22 THEN 'Andre' WHEN 23 THEN 'Lefevre'
-                    ELSE 'Mercier'
-                END AS gen_last_name,
-                /* Join key cycling through source sample size */
-                (b.row_id % NULLIF((SELECT MAX(SRC_RN) FROM source_sample), 0)) + 1 AS src_k
-            FROM base_rows b
-        ),
-        joined AS (
-            SELECT a.*, s.SRC_EMAIL, s.SRC_PHONE, s.SRC_FIRST_NAME, s.SRC_LAST_NAME
-            FROM assigned a
-            LEFT JOIN source_sample s
-              ON s.SRC_RN = a.src_k
-        ),
-        enriched AS (
-            SELECT 
-                CASE overlap_type WHEN 'TRIPLE' THEN COALESCE(SRC_FIRST_NAME, gen_first_name) ELSE gen_first_name END AS first_name,
-                CASE overlap_type WHEN 'TRIPLE' THEN COALESCE(SRC_LAST_NAME, gen_last_name) ELSE gen_last_name END AS last_name,
-                CASE overlap_type
-                    WHEN 'TRIPLE' THEN SRC_EMAIL
-                    WHEN 'EMAIL' THEN SRC_EMAIL
-                    ELSE LOWER(gen_first_name) || '.' || LOWER(gen_last_name) || '@' ||
-                         CASE (row_id % 6)
-                            WHEN 0 THEN 'gmail.com' WHEN 1 THEN 'orange.fr' WHEN 2 THEN 'free.fr'
-                            WHEN 3 THEN 'wanadoo.fr' WHEN 4 THEN 'sfr.fr' ELSE 'laposte.net'
-                         END
-                END AS email_raw,
-                CASE overlap_type
-                    WHEN 'TRIPLE' THEN SRC_PHONE
-                    WHEN 'PHONE' THEN SRC_PHONE
-                    ELSE '0' || (1 + (row_id % 6)) || ' ' ||
-                         LPAD(UNIFORM(10, 99, RANDOM()), 2, '0') || ' ' ||
-                         LPAD(UNIFORM(10, 99, RANDOM()), 2, '0') || ' ' ||
-                         LPAD(UNIFORM(10, 99, RANDOM()), 2, '0') || ' ' ||
-                         LPAD(UNIFORM(10, 99, RANDOM()), 2, '0')
-                END AS phone_raw,
-                CASE (row_id % 2) WHEN 0 THEN 'Male' ELSE 'Female' END AS gender,
-                CASE (row_id % 8)
-                    WHEN 0 THEN 'Engineer' WHEN 1 THEN 'Teacher' WHEN 2 THEN 'Student' WHEN 3 THEN 'Nurse'
-                    WHEN 4 THEN 'Sales' WHEN 5 THEN 'Artist' WHEN 6 THEN 'Manager' ELSE 'Consultant'
-                END AS profession,
-                DATEADD(day, -UNIFORM(0, 3650, RANDOM()), CURRENT_DATE()) AS date_joined,
-                CASE (row_id % 4)
-                    WHEN 0 THEN 'FREE' WHEN 1 THEN 'BASIC' WHEN 2 THEN 'STANDARD' ELSE 'PREMIUM'
-                END AS subscription_level,
-                overlap_type,
-                row_id
-            FROM joined
-        ),
-        with_missing AS (
-            SELECT 
-                'SF1-' || LPAD(row_id::STRING, 10, '0') AS customer_id,
-                first_name,
-                last_name,
-                CASE WHEN overlap_type IN ('TRIPLE','EMAIL') THEN email_raw
-                     WHEN UNIFORM(0,1,RANDOM()) < 0.15 THEN NULL
-                     ELSE email_raw END AS email,
-                CASE WHEN overlap_type IN ('TRIPLE','PHONE') THEN phone_raw
-                     WHEN UNIFORM(0,1,RANDOM()) < 0.20 THEN NULL
-                     ELSE phone_raw END AS phone,
-                gender, profession, date_joined, subscription_level, overlap_type
-            FROM enriched
+                ROW_NUMBER() OVER (ORDER BY SEQ4()) AS SRC_RN
+            FROM (
+                SELECT EMAIL, PHONE, FIRST_NAME, LAST_NAME
+                FROM {SOURCE_TABLE}
+                WHERE EMAIL IS NOT NULL OR PHONE IS NOT NULL
+            ) SAMPLE ({src_count} ROWS)
         ),
-        dups AS (
+        staged AS (
             SELECT 
-                customer_id || '_DUP' AS customer_id,
-                CASE WHEN UNIFORM(0,1,RANDOM()) < 0.5 AND email IS NOT NULL THEN 
-                    REGEXP_REPLACE(email, '@', CAST(UNIFORM(0,9,RANDOM()) AS STRING) || '@')
-                ELSE email END AS email,
-                CASE WHEN UNIFORM(0,1,RANDOM()) < 0.5 AND phone IS NOT NULL THEN 
-                    SUBSTR(phone, 1, LENGTH(phone)-1) || CAST(UNIFORM(0,9,RANDOM()) AS STRING)
-                ELSE phone END AS phone,
-                first_name, last_name, gender, profession, date_joined, subscription_level,
-                'DUPLICATE' AS overlap_type
-            FROM (
-                SELECT * FROM with_missing
-                WHERE overlap_type = 'NONE'
-                QUALIFY ROW_NUMBER() OVER (ORDER BY RANDOM()) <= {dup_count}
-            )
+                $1:CUSTOMER_ID::STRING AS customer_id,
+                $1:EMAIL::STRING AS email,
+                $1:PHONE::STRING AS phone,
+                $1:FIRST_NAME::STRING AS first_name,
+                $1:LAST_NAME::STRING AS last_name,
+                $1:GENDER::STRING AS gender,
+                $1:PROFESSION::STRING AS profession,
+                $1:DATE_JOINED::DATE AS date_joined,
+                $1:SUBSCRIPTION_LEVEL::STRING AS subscription_level,
+                $1:OVERLAP_TYPE::STRING AS overlap_type,
+                ($1:SRC_K::INTEGER % {max(src_count, 1)}) + 1 AS src_k
+            FROM @{LOAD_STAGE}/{file_name} (FILE_FORMAT => '{LOAD_FILE_FORMAT}')
         )
-        SELECT customer_id, email, phone, first_name, last_name, gender, profession, date_joined, subscription_level, overlap_type
-        FROM with_missing
-        UNION ALL
-        SELECT customer_id, email, phone, first_name, last_name, gender, profession, date_joined, subscription_level, overlap_type
-        FROM dups
+        SELECT 
+            f.customer_id,
+            IFF(f.overlap_type IN ('TRIPLE', 'EMAIL'), s.SRC_EMAIL, f.email) AS email,
+            IFF(f.overlap_type IN ('TRIPLE', 'PHONE'), s.SRC_PHONE, f.phone) AS phone,
+            IFF(f.overlap_type = 'TRIPLE', COALESCE(s.SRC_FIRST_NAME, f.first_name), f.first_name) AS first_name,
+            IFF(f.overlap_type = 'TRIPLE', COALESCE(s.SRC_LAST_NAME, f.last_name), f.last_name) AS last_name,
+            f.gender, f.profession, f.date_joined, f.subscription_level, f.overlap_type
+        FROM staged f
+        LEFT JOIN src s
+          ON s.SRC_RN = f.src_k
+        ORDER BY f.customer_id
     """
 
-    if overwrite:
-        _exec(session, f"CREATE OR REPLACE TABLE {full_table} AS " + select_sql)
-    else:
-        _exec(session, f"CREATE TABLE IF NOT EXISTS {full_table} AS " + select_sql + " WHERE 1=0")
-        _exec(session, f"INSERT INTO {full_table} " + select_sql)
+    # Rows are written sorted on the clustering key, so no reclustering is needed
+    try:
+        if overwrite:
+            exec_sql(session, f"CREATE OR REPLACE TABLE {full_table} CLUSTER BY (customer_id) AS " + select_sql)
+        else:
+            exec_batch(
+                session,
+                f"CREATE TABLE IF NOT EXISTS {full_table} {CRM_COLUMNS} CLUSTER BY (customer_id)",
+                f"INSERT INTO {full_table} " + select_sql,
+            )
+    finally:
+        # Never leave the staged file behind, even when the load fails
+        exec_sql(session, f"REMOVE @{LOAD_STAGE}/{file_name}")
 
     # Return a small preview (
-    return session.sql(f"SELECT * FROM {full_table} SAMPLE (100 ROWS)")
+    return session.sql(f"SELECT * FROM {full_table} LIMIT 100")
 
 
 # Optional SP-compatible entrypoint name
@@ -0,0 +1,27 @@
+"""
+Shared SQL execution helpers for the SF1+ Snowpark generators.
+
+Only depends on Snowpark, so SQL-only handlers can import it without
+NumPy/Arrow in their PACKAGES.
+"""
+
+from snowflake.snowpark import AsyncJob, Session
+
+
+def exec_sql(session: Session, sql: str) -> None:
+    session.sql(sql).collect()
+
+
+def exec_async(session: Session, sql: str) -> AsyncJob:
+    """Submit `sql` without waiting; call `.result()` on the returned job to block on it."""
+    return session.sql(sql).collect_nowait()
+
+
+def script_block(*statements: str) -> str:
+    """Wrap several statements as one anonymous Snowflake Scripting block (one round-trip)."""
+    body = "\n".join(f"{stmt.strip()};" for stmt in statements)
+    return f"EXECUTE IMMEDIATE $$\nBEGIN\n{body}\nEND;\n$$"
+
+
+def exec_batch(session: Session, *statements: str) -> None:
+    exec_sql(session, script_block(*statements))
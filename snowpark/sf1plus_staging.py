@@ -0,0 +1,32 @@
+"""
+Shared NumPy/Arrow helpers for the SF1+ generators that synthesize rows locally
+and load them from a staged Parquet file.
+"""
+
+import io
+import uuid
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from snowflake.snowpark import Session
+
+
+def lookup(values: list, idx: np.ndarray) -> pa.Array:
+    """`values[idx % len(values)]` as an Arrow array; indices wrap around the list."""
+    return pa.array(values).take(pa.array(idx % len(values)))
+
+
+def to_str(values: np.ndarray) -> pa.Array:
+    return pa.array(values).cast(pa.string())
+
+
+def stage_parquet(session: Session, table: pa.Table, stage: str, prefix: str) -> str:
+    """Write `table` as Snappy Parquet, PUT it to `stage` and return the staged file name."""
+    file_name = f"{prefix}_{uuid.uuid4().hex}.parquet"
+    buf = io.BytesIO()
+    pq.write_table(table, buf, compression="snappy")
+    buf.seek(0)
+    session.file.put_stream(buf, f"@{stage}/{file_name}", auto_compress=False, overwrite=True)
+    return file_name
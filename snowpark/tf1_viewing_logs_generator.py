@@ -1,32 +1,471 @@
 """
 TF1 Viewing Logs Generator (Snowpark)
 
-Generates a realistic one-week TF1 viewing logs table using a single CTAS.
+Generates a realistic one-week TF1 viewing logs table.
 Features:
 - 7 days x 48 half-hour slots with time-of-day and weekend weighting
 - ~30% of logs linked to existing SF1PLUS_CRM customers
 - French IP address generation by ISP ranges
-- Smart TV/device metadata in semi-structured VARIANT column
+- Smart TV/device metadata as flat columns, with a VARIANT `device` on the _V view
 - Ad break estimation based on watch duration
 
+Modes:
+- "weekly" (default): events are synthesized locally with NumPy/Arrow, written as a
+  single Parquet file and PUT to an internal stage; one CTAS then reads the staged
+  file and attaches CRM customers.
+- "simple": deterministic patterns generated entirely in SQL, same output table.
+- "high_volume": millions of SQL-generated events over 4 weeks, written to
+  TF1_VIEWING_LOGS_HIGH_VOLUME.
+
+The _simple and _high_volume modules are thin entrypoints over this one. The weekly
+NumPy/Arrow code lives in tf1_viewing_logs_weekly (imported only by that mode), so
+handlers for the SQL modes need only IMPORTS of their entrypoint, this module and
+sf1plus_sql.py, and no numpy/pyarrow PACKAGES. Weekly handlers also IMPORT
+tf1_viewing_logs_weekly.py and sf1plus_staging.py, with numpy and pyarrow PACKAGES.
+
 Entrypoints:
-- run(session, sample_multiplier, attach_customer_pct, overwrite)
-- sp_entry(session, sample_multiplier?, attach_customer_pct?, overwrite?)
+- run(session, sample_multiplier, attach_customer_pct, overwrite, mode, total_events)
+- sp_entry(session, sample_multiplier?, attach_customer_pct?, overwrite?, mode?, total_events?)
 """
 
-from typing import Optional
+from typing import Literal, Optional
+import math
+import uuid
 
 from snowflake.snowpark import Session
 
+from sf1plus_sql import exec_batch, exec_sql
+
 
 TARGET_DB = "SF1PLUS_DB"
 RAW_SCHEMA = "RAW_DATA"
+BRONZE_SCHEMA = "BRONZE"
 OUTPUT_TABLE = "TF1_VIEWING_LOGS"
+HIGH_VOLUME_TABLE = "TF1_VIEWING_LOGS_HIGH_VOLUME"
 CUSTOMER_TABLE = f"{TARGET_DB}.{RAW_SCHEMA}.SF1PLUS_CRM"
+LOAD_STAGE = f"{TARGET_DB}.{BRONZE_SCHEMA}.TF1_VIEWING_LOGS_LOAD"
+LOAD_FILE_FORMAT = f"{TARGET_DB}.{BRONZE_SCHEMA}.SF1PLUS_PARQUET"
+
+Mode = Literal["weekly", "simple", "high_volume"]
+MODES = ("weekly", "simple", "high_volume")
+
+# Lookup lists shared by the weekly and "simple" modes
+DEVICE_TYPES = ["SmartTV", "Mobile", "Web", "Tablet"]
+CONNECTION_TYPES = ["wifi", "ethernet", "cellular"]
+ISPS = ["Orange", "Free", "Bouygues"]
+REGIONS = [
+    "Île-de-France", "Auvergne-Rhône-Alpes", "Provence-Alpes-Côte d'Azur",
+    "Nouvelle-Aquitaine", "Occitanie", "Hauts-de-France",
+]
+CITIES = ["Paris", "Lyon", "Marseille", "Bordeaux", "Toulouse", "Lille"]
+
+# SQL modes: lookup tables indexed by event_id modulo their length (inlined as SQL
+# array constants). "simple" shares the device, connection, ISP and geo lists above.
+# OS and DRM by event_id % 12, which fixes the % 4 device branch and its % 3 / % 2 sub-branch
+SIMPLE_OS_NAMES = [
+    "Tizen", "iOS", "ChromeOS", "iPadOS", "webOS", "iOS",
+    "ChromeOS", "iPadOS", "Android TV", "iOS", "ChromeOS", "iPadOS",
+]
+SIMPLE_DRMS = [
+    "playready", "fairplay", "widevine", "fairplay", "playready", "fairplay",
+    "widevine", "fairplay", "widevine", "fairplay", "widevine", "fairplay",
+]
+SIMPLE_EVENT_TYPES = ["play_start"] + ["play"] * 16 + ["seek", "pause", "play_end"]
+# Manufacturer and model by device type, shared with the weekly mode
+SIMPLE_MANUFACTURERS = ["Samsung", "Apple", "LG", "LG"]
+SIMPLE_MODELS = ["QE55", "iPhone", "web", "web"]
+
+HV_OS_NAMES = ["Tizen", "iOS", "ChromeOS", "Android"]
+HV_EVENT_TYPES = ["play_start"] + ["play"] * 6 + ["seek", "pause", "play_end"]
+HV_REGIONS = [
+    "Île-de-France", "Auvergne-Rhône-Alpes", "Provence-Alpes-Côte d'Azur", "Nouvelle-Aquitaine",
+    "Occitanie", "Hauts-de-France", "Grand Est", "Normandie",
+]
+HV_CITIES = [
+    "Paris", "Lyon", "Marseille", "Toulouse", "Nice",
+    "Nantes", "Strasbourg", "Montpellier", "Bordeaux", "Lille",
+]
+HV_MANUFACTURERS = ["Samsung", "Apple", "LG", "Sony"]
+# Customer mapping for high-volume joins - a bounded pool is enough for realistic cycling
+HV_CUSTOMER_POOL_ROWS = 10_000
+
+# Output columns in SELECT order, named in INSERTs so appends never rely on position
+VIEWING_LOG_COLUMNS = (
+    "log_id", "channel", "event_time", "slot_start_time", "programme_id", "customer_id",
+    "device_type", "os_name", "connection_type", "bitrate_kbps", "buffer_events", "rebuffer_ratio",
+    "watch_seconds", "ad_breaks", "ad_total_seconds", "event_type", "ip_address", "isp", "country",
+    "region", "city", "device_id", "session_id", "app_version", "player_version", "resolution",
+    "drm", "manufacturer", "model",
+)
+HV_COLUMNS = tuple(c for c in VIEWING_LOG_COLUMNS if c not in ("drm", "model"))
+
+# The device VARIANT is assembled on read by the _V view rather than per row at write time
+DEVICE_VIEW_SELECT = """
+    SELECT *, OBJECT_CONSTRUCT(
+        'device_id', device_id, 'session_id', session_id, 'app_name', 'TF1+',
+        'app_version', app_version, 'player_version', player_version, 'resolution', resolution,
+        'drm', drm, 'manufacturer', manufacturer, 'model', model
+    ) AS device
+    FROM {table}
+"""
+HV_DEVICE_VIEW_SELECT = """
+    SELECT *, OBJECT_CONSTRUCT(
+        'device_id', device_id, 'session_id', session_id, 'app_name', 'TF1+',
+        'app_version', app_version, 'player_version', player_version, 'resolution', resolution,
+        'manufacturer', manufacturer
+    ) AS device
+    FROM {table}
+"""
+
 
+def _sql_array(values: list) -> str:
+    return "ARRAY_CONSTRUCT(" + ", ".join("'" + str(v).replace("'", "''") + "'" for v in values) + ")"
 
-def _exec(session: Session, sql: str) -> None:
-    session.sql(sql).collect()
+
+def _table_columns(session: Session, schema: str, table: str) -> list:
+    """Upper-case column names of an existing table; empty when the table does not exist."""
+    rows = session.sql(
+        f"SELECT COLUMN_NAME FROM {TARGET_DB}.INFORMATION_SCHEMA.COLUMNS "
+        f"WHERE TABLE_SCHEMA = '{schema}' AND TABLE_NAME = '{table}'"
+    ).collect()
+    return [row[0] for row in rows]
+
+
+def _simple_sql(total_events: int, attach_threshold: int, run_id: str, customer_ids: list) -> str:
+    """Deterministic-pattern events 12s apart through the current week, all in SQL."""
+    customer_count = max(len(customer_ids), 1)
+
+    # Events are 12s apart from a midnight anchor, so the minute slot is plain arithmetic
+    # on event_id; programme labels are formatted once per minute instead of once per event
+    minute_slots = (total_events - 1) // 5 + 1
+
+    # Ultra-simple approach: no subqueries, just deterministic patterns
+    return f"""
+        WITH seq AS (
+            -- SEQ8() may skip values, so number the rows once for a dense event_id;
+            -- unlike SEQ4() it does not wrap past 2^32 rows, keeping large runs ordered
+            SELECT ROW_NUMBER() OVER (ORDER BY SEQ8())::NUMBER(19, 0) AS event_id
+            FROM TABLE(GENERATOR(ROWCOUNT => {total_events}))
+        ),
+        base_events AS (
+            SELECT 
+                event_id,
+                DATEADD('second', (event_id - 1) * 12, DATE_TRUNC('WEEK', CURRENT_DATE())) AS event_time,
+                FLOOR((event_id - 1) / 5) AS minute_slot
+            FROM seq
+        ),
+        minute_labels AS (
+            SELECT 
+                minute_slot,
+                DATEADD('hour', FLOOR(minute_slot / 60), DATE_TRUNC('WEEK', CURRENT_DATE())) AS slot_start_time,
+                'TF1-' || TO_CHAR(
+                    DATEADD('minute', minute_slot, DATE_TRUNC('WEEK', CURRENT_DATE())),
+                    'YYYYMMDD-HH24MI'
+                ) AS programme_id
+            FROM (
+                SELECT ROW_NUMBER() OVER (ORDER BY SEQ4()) - 1 AS minute_slot
+                FROM TABLE(GENERATOR(ROWCOUNT => {minute_slots}))
+            )
+        ),
+        customer_map AS (
+            SELECT {_sql_array(customer_ids)} AS ids
+        ),
+        events_with_customer_flag AS (
+            SELECT 
+                event_id,
+                event_time,
+                minute_slot,
+                -- NULL index for unattached events; GET then yields NULL without a branch
+                CASE WHEN (event_id % 100) < {attach_threshold} THEN event_id % {customer_count} END AS customer_idx,
+                -- Shared per-row features, computed once and referenced by final
+                event_id % 3 AS m3,
+                event_id % 4 AS m4,
+                event_id % 6 AS m6,
+                event_id % 12 AS m12,
+                event_id % 20 AS m20,
+                event_id % 256 AS b0,
+                (event_id * 3) % 256 AS b3,
+                (event_id * 7) % 256 AS b7,
+                800 + (event_id % 5700) AS bitrate_kbps,
+                30 + (event_id % 1770) AS watch_seconds,
+                FLOOR((30 + (event_id % 1770)) / 180) AS ad_breaks
+            FROM base_events
+        ),
+        final AS (
+            -- Single projection pass: typed output columns and device metadata are
+            -- derived straight from the shared features, no intermediate CTE
+            SELECT 
+                CAST('log_{run_id}_' || LPAD(e.event_id::STRING, 12, '0') AS STRING) AS log_id,
+                CAST('TF1' AS STRING) AS channel,
+                CAST(e.event_time AS TIMESTAMP_NTZ) AS event_time,
+                CAST(ml.slot_start_time AS TIMESTAMP_NTZ) AS slot_start_time,
+                CAST(ml.programme_id AS STRING) AS programme_id,
+                
+                -- Use actual customer IDs via array lookup
+                CAST(GET(c.ids, e.customer_idx) AS STRING) AS customer_id,
+                
+                -- Device type and OS based on event_id modulo
+                CAST(GET({_sql_array(DEVICE_TYPES)}, e.m4) AS STRING) AS device_type,
+                CAST(GET({_sql_array(SIMPLE_OS_NAMES)}, e.m12) AS STRING) AS os_name,
+                
+                -- Connection type
+                CAST(GET({_sql_array(CONNECTION_TYPES)}, e.m3) AS STRING) AS connection_type,
+                
+                -- QoE metrics
+                CAST(e.bitrate_kbps AS NUMBER) AS bitrate_kbps,
+                CAST(e.m6 AS NUMBER) AS buffer_events,
+                CAST(ROUND((e.event_id % 80) / 1000.0, 3) AS FLOAT) AS rebuffer_ratio,
+                CAST(e.watch_seconds AS NUMBER) AS watch_seconds,
+                CAST(e.ad_breaks AS NUMBER) AS ad_breaks,
+                CAST(e.ad_breaks * 30 AS NUMBER) AS ad_total_seconds,
+                
+                -- Event type
+                CAST(GET({_sql_array(SIMPLE_EVENT_TYPES)}, e.m20) AS STRING) AS event_type,
+                
+                -- IP and geo: octets are picked per ISP branch, then formatted in a
+                -- single CONCAT_WS (48-63 is always two digits; Free keeps its 3-digit pad)
+                CAST(CONCAT_WS('.',
+                    DECODE(e.m3, 0, 81, 1, 82, 90),
+                    DECODE(e.m3, 0, (48 + (e.event_id % 16))::STRING,
+                                 1, LPAD((64 + (e.event_id % 64))::STRING, 3, '0'),
+                                 e.b0::STRING),
+                    IFF(e.m3 = 2, e.b3, e.b0),
+                    e.b7
+                ) AS STRING) AS ip_address,
+                
+                CAST(GET({_sql_array(ISPS)}, e.m3) AS STRING) AS isp,
+                
+                CAST('FR' AS STRING) AS country,
+                
+                CAST(GET({_sql_array(REGIONS)}, e.m6) AS STRING) AS region,
+                
+                CAST(GET({_sql_array(CITIES)}, e.m6) AS STRING) AS city,
+                
+                -- Flat device metadata; drm/manufacturer/model follow the OS and device type above
+                CAST('dev_' || (e.event_id % 100000)::STRING AS STRING) AS device_id,
+                CAST('sess_' || (e.event_id % 10000)::STRING AS STRING) AS session_id,
+                CAST('1.' || (e.event_id % 10)::STRING || '.' || ((e.event_id * 3) % 10)::STRING AS STRING) AS app_version,
+                CAST('4.' || (e.event_id % 5)::STRING AS STRING) AS player_version,
+                CAST(CASE WHEN e.bitrate_kbps > 4000 THEN '1920x1080' 
+                          WHEN e.bitrate_kbps > 2000 THEN '1280x720' 
+                          ELSE '854x480' END AS STRING) AS resolution,
+                CAST(GET({_sql_array(SIMPLE_DRMS)}, e.m12) AS STRING) AS drm,
+                CAST(GET({_sql_array(SIMPLE_MANUFACTURERS)}, e.m4) AS STRING) AS manufacturer,
+                CAST(GET({_sql_array(SIMPLE_MODELS)}, e.m4) AS STRING) AS model
+            FROM events_with_customer_flag e
+            JOIN minute_labels ml ON ml.minute_slot = e.minute_slot
+            CROSS JOIN customer_map c
+        )
+        SELECT * FROM final
+    """
+
+
+def _high_volume_sql(total_events: int, attach_threshold: int, run_id: str, total_customers: int) -> str:
+    """High-throughput events 2s apart over 4 weeks, all in SQL."""
+    pool_rows = HV_CUSTOMER_POOL_ROWS
+
+    # Programme labels are formatted once per hour slot, as in _simple_sql
+    hour_slots = (total_events - 1) * 2 // 3600 + 1
+
+    # High-volume generation with efficient patterns
+    return f"""
+        WITH seq AS (
+            SELECT ROW_NUMBER() OVER (ORDER BY SEQ8())::NUMBER(19, 0) AS event_id
+            FROM TABLE(GENERATOR(ROWCOUNT => {total_events}))
+        ),
+        base_events AS (
+            SELECT 
+                event_id,
+                -- Spread events over 4 weeks for more variety
+                DATEADD('second', (event_id - 1) * 2, DATE_TRUNC('WEEK', CURRENT_DATE()) - INTERVAL '21 days') AS event_time,
+                FLOOR((event_id - 1) * 2 / 3600) AS hour_slot,
+                -- Only attached events (30% by default) get a probe key; NULL keys skip the lookup
+                CASE WHEN (event_id % 100) < {attach_threshold}
+                     THEN (event_id % {total_customers}) + 1 END AS probe_rn
+            FROM seq
+        ),
+        hour_labels AS (
+            SELECT 
+                hour_slot,
+                DATEADD('hour', hour_slot, DATE_TRUNC('WEEK', CURRENT_DATE()) - INTERVAL '21 days') AS slot_start_time,
+                'TF1-' || TO_CHAR(
+                    DATEADD('hour', hour_slot, DATE_TRUNC('WEEK', CURRENT_DATE()) - INTERVAL '21 days'),
+                    'YYYYMMDD-HH24'
+                ) AS programme_id
+            FROM (
+                SELECT ROW_NUMBER() OVER (ORDER BY SEQ4()) - 1 AS hour_slot
+                FROM TABLE(GENERATOR(ROWCOUNT => {hour_slots}))
+            )
+        ),
+        customer_map AS (
+            -- SAMPLE is already random, so rn only needs to be dense
+            SELECT customer_id, ROW_NUMBER() OVER (ORDER BY SEQ4()) AS rn
+            FROM {CUSTOMER_TABLE}
+            SAMPLE ({pool_rows} ROWS)
+        ),
+        events_enriched AS (
+            SELECT 
+                e.event_id,
+                e.event_time,
+                h.slot_start_time,
+                h.programme_id,
+                -- Customer attachment - cycle through available customers
+                c.customer_id,
+                e.event_id % 3 AS m3,
+                e.event_id % 4 AS m4,
+                e.event_id % 8 AS m8,
+                e.event_id % 10 AS m10,
+                e.event_id % 256 AS b0,
+                (e.event_id * 3) % 256 AS b3,
+                (e.event_id * 7) % 256 AS b7,
+                (e.event_id * 11) % 256 AS b11,
+                (e.event_id * 13) % 256 AS b13,
+                1000 + (e.event_id % 5000) AS bitrate,
+                60 + (e.event_id % 1200) AS watch_seconds,
+                -- Ad breaks computed once; final derives the ad seconds from it
+                FLOOR((60 + (e.event_id % 1200)) / 180) AS ad_breaks
+            FROM base_events e
+            JOIN hour_labels h ON h.hour_slot = e.hour_slot
+            LEFT JOIN customer_map c ON c.rn = e.probe_rn
+        ),
+        final AS (
+            SELECT 
+                CAST('log_{run_id}_' || LPAD(event_id::STRING, 12, '0') AS STRING) AS log_id,
+                CAST('TF1' AS STRING) AS channel,
+                CAST(event_time AS TIMESTAMP_NTZ) AS event_time,
+                CAST(slot_start_time AS TIMESTAMP_NTZ) AS slot_start_time,
+                CAST(programme_id AS STRING) AS programme_id,
+                CAST(customer_id AS STRING) AS customer_id,
+                
+                -- Device patterns (simplified for performance)
+                CAST(GET({_sql_array(DEVICE_TYPES)}, m4) AS STRING) AS device_type,
+                
+                CAST(GET({_sql_array(HV_OS_NAMES)}, m4) AS STRING) AS os_name,
+                
+                CAST(GET({_sql_array(CONNECTION_TYPES)}, m3) AS STRING) AS connection_type,
+                
+                -- QoE metrics
+                CAST(bitrate AS NUMBER) AS bitrate_kbps,
+                CAST(m8 AS NUMBER) AS buffer_events,
+                CAST(ROUND((event_id % 50) / 1000.0, 3) AS FLOAT) AS rebuffer_ratio,
+                CAST(watch_seconds AS NUMBER) AS watch_seconds,
+                CAST(ad_breaks AS NUMBER) AS ad_breaks,
+                CAST(ad_breaks * 30 AS NUMBER) AS ad_total_seconds,
+                
+                -- Event type
+                CAST(GET({_sql_array(HV_EVENT_TYPES)}, m10) AS STRING) AS event_type,
+                
+                -- French IP ranges: octets are picked as integers per ISP branch,
+                -- then formatted in a single CONCAT_WS
+                CAST(CONCAT_WS('.',
+                    DECODE(m3, 0, 81, 1, 82, 90),
+                    DECODE(m3, 0, 50 + (event_id % 14), 1, 70 + (event_id % 50), b0),
+                    IFF(m3 = 2, b3, b0),
+                    DECODE(m3, 0, b7, 1, b11, b13)
+                ) AS STRING) AS ip_address,
+                
+                CAST(GET({_sql_array(ISPS)}, m3) AS STRING) AS isp,
+                
+                CAST('FR' AS STRING) AS country,
+                
+                CAST(GET({_sql_array(HV_REGIONS)}, m8) AS STRING) AS region,
+                
+                CAST(GET({_sql_array(HV_CITIES)}, m10) AS STRING) AS city,
+                
+                -- Simplified device metadata for performance, as flat columns
+                CAST('dev_' || (event_id % 100000)::STRING AS STRING) AS device_id,
+                CAST('sess_' || (event_id % 10000)::STRING AS STRING) AS session_id,
+                CAST('2.' || (event_id % 5)::STRING AS STRING) AS app_version,
+                CAST('5.' || m3::STRING AS STRING) AS player_version,
+                CAST(CASE WHEN bitrate > 3000 THEN '1920x1080' 
+                          WHEN bitrate > 1500 THEN '1280x720' 
+                          ELSE '854x480' END AS STRING) AS resolution,
+                CAST(GET({_sql_array(HV_MANUFACTURERS)}, m4) AS STRING) AS manufacturer
+                
+            FROM events_enriched
+        )
+        SELECT * FROM final
+    """
+
+
+def _build_sql(session: Session, mode: Mode, total_events: int, attach_pct: float) -> str:
+    """Return the SELECT generating `total_events` rows for a SQL mode ("simple" / "high_volume")."""
+    # (event_id % 100) < attach_pct * 100, as an integer literal (no per-row float compare)
+    attach_threshold = math.ceil(round(attach_pct * 100, 6))
+    # Log ids are derived from event_id; the per-run prefix keeps appended runs unique
+    run_id = uuid.uuid4().hex[:12]
+
+    if mode == "simple":
+        # Events cycle through at most 1000 customers, so fetch them once and inline them
+        # as an array literal: a per-row index lookup instead of a join
+        customer_ids = [
+            row[0] for row in session.sql(
+                f"SELECT customer_id FROM {CUSTOMER_TABLE} SAMPLE (1000 ROWS)"
+            ).collect()
+        ]
+        return _simple_sql(total_events, attach_threshold, run_id, customer_ids)
+
+    # SAMPLE (n ROWS) returns exactly min(n, table rows), so the map size is known up front
+    # and is inlined as a literal: the join key is a constant-modulo expression
+    crm_rows = session.sql(f"SELECT COUNT(*) FROM {CUSTOMER_TABLE}").collect()[0][0]
+    total_customers = max(min(HV_CUSTOMER_POOL_ROWS, int(crm_rows)), 1)
+    return _high_volume_sql(total_events, attach_threshold, run_id, total_customers)
+
+
+def _load(
+    session: Session,
+    table: str,
+    select_sql: str,
+    columns: tuple,
+    cluster_by: str,
+    order_by: str,
+    view_select: str,
+    overwrite: bool,
+) -> None:
+    """
+    Generate once: CTAS when replacing or creating, a single INSERT when appending;
+    the load and the device view go out in one round-trip. Rows are written sorted on
+    `order_by` so the initial micro-partition layout already matches `cluster_by`.
+    """
+    full_table = f"{TARGET_DB}.{RAW_SCHEMA}.{table}"
+    existing = [] if overwrite else _table_columns(session, RAW_SCHEMA, table)
+    if not existing:
+        load_sql = f"CREATE OR REPLACE TABLE {full_table} CLUSTER BY ({cluster_by}) AS {select_sql} ORDER BY {order_by}"
+    elif "DEVICE" in existing:
+        # Tables built before the device metadata was flattened keep a `device` VARIANT column
+        raise RuntimeError(
+            f"{full_table} still has the old `device` VARIANT column and cannot be appended to; "
+            "rerun with overwrite=True to rebuild it with flat device columns"
+        )
+    else:
+        load_sql = f"INSERT INTO {full_table} ({', '.join(columns)}) {select_sql} ORDER BY {order_by}"
+    exec_batch(
+        session,
+        load_sql,
+        f"CREATE OR REPLACE VIEW {full_table}_V AS " + view_select.format(table=full_table),
+    )
+
+
+def _run_sql(session: Session, mode: Mode, total_events: int, attach_pct: float, overwrite: bool) -> "Session":
+    exec_batch(
+        session,
+        f"CREATE DATABASE IF NOT EXISTS {TARGET_DB}",
+        f"CREATE SCHEMA IF NOT EXISTS {TARGET_DB}.{RAW_SCHEMA}",
+    )
+
+    select_sql = _build_sql(session, mode, total_events, attach_pct)
+    if mode == "simple":
+        # Same clustering as the weekly mode, which writes this table too
+        table = OUTPUT_TABLE
+        _load(session, table, select_sql, VIEWING_LOG_COLUMNS, "slot_start_time, customer_id",
+              "slot_start_time, customer_id", DEVICE_VIEW_SELECT, overwrite)
+    else:
+        # Day-level clustering for time-range scans
+        table = HIGH_VOLUME_TABLE
+        _load(session, table, select_sql, HV_COLUMNS, "DATE_TRUNC('day', event_time)", "event_time",
+              HV_DEVICE_VIEW_SELECT, overwrite)
+
+    return session.sql(f"SELECT * FROM {TARGET_DB}.{RAW_SCHEMA}.{table} LIMIT 100")
 
 
 def run(
@@ -34,255 +473,100 @@ def run(
     sample_multiplier: int = 1,
     attach_customer_pct: float = 0.30,
     overwrite: bool = True,
+    mode: Mode = "weekly",
+    total_events: Optional[int] = None,
 ) -> "Session":
     """
-    Build TF1 viewing logs for one week.
+    Build TF1 viewing logs.
 
     Args:
         session: Snowpark session
         sample_multiplier: scales events per slot (baseline ~100). Use 1 by default (≈10% sample)
         attach_customer_pct: fraction of events that should have a customer_id (default 0.30)
         overwrite: whether to replace the output table
+        mode: "weekly" (local Parquet, default), "simple" or "high_volume" (SQL-generated)
+        total_events: events to generate in the SQL modes (default 50,000 * sample_multiplier)
 
     Returns:
         A small preview DataFrame (100 rows)
     """
-    _exec(session, f"CREATE DATABASE IF NOT EXISTS {TARGET_DB}")
-    _exec(session, f"CREATE SCHEMA IF NOT EXISTS {TARGET_DB}.{RAW_SCHEMA}")
-
-    full_table = f"{TARGET_DB}.{RAW_SCHEMA}.{OUTPUT_TABLE}"
-
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
     # Clamp attach_customer_pct to [0,1]
     attach_pct = max(0.0, min(1.0, float(attach_customer_pct)))
+    if mode != "weekly":
+        if total_events is None:
+            total_events = 50_000 * int(sample_multiplier)
+        return _run_sql(session, mode, int(total_events), attach_pct, overwrite)
+
+    exec_batch(
+        session,
+        f"CREATE DATABASE IF NOT EXISTS {TARGET_DB}",
+        f"CREATE SCHEMA IF NOT EXISTS {TARGET_DB}.{RAW_SCHEMA}",
+        f"CREATE SCHEMA IF NOT EXISTS {TARGET_DB}.{BRONZE_SCHEMA}",
+        f"CREATE STAGE IF NOT EXISTS {LOAD_STAGE}",
+        f"CREATE FILE FORMAT IF NOT EXISTS {LOAD_FILE_FORMAT} TYPE = PARQUET USE_LOGICAL_TYPE = TRUE",
+    )
+
+    import tf1_viewing_logs_weekly
 
-    # Baseline events per slot around 100; weight by time-of-day/day-of-week and scale by multiplier
-    # We generate up to 600 candidates per slot and keep the first N via QUALIFY
-    # This produces a realistic distribution without temporary tables.
+    file_name = tf1_viewing_logs_weekly.stage_events(session, LOAD_STAGE, int(sample_multiplier), attach_pct)
+
+    # Attach customers from a pre-sampled pool while reading the staged file;
+    # unattached events get a NULL key that skips the probe
     select_sql = f"""
-        WITH params AS (
-            SELECT 
-                DATE_TRUNC('WEEK', CURRENT_DATE()) AS week_start,
-                {sample_multiplier}::INTEGER AS sample_multiplier,
-                {attach_pct}::FLOAT AS attach_customer_pct
-        ),
-        slots AS (
-            SELECT ROW_NUMBER() OVER (ORDER BY SEQ4()) - 1 AS slot_index
-            FROM TABLE(GENERATOR(ROWCOUNT => 336)) -- 7 days * 48 half-hour slots
-        ),
-        slot_times AS (
-            SELECT 
-                s.slot_index,
-                DATEADD('minute', s.slot_index * 30, TO_TIMESTAMP_NTZ((SELECT week_start FROM params))) AS slot_start_ts
-            FROM slots s
-        ),
-        slot_weight AS (
-            SELECT 
-                slot_index,
-                slot_start_ts,
-                EXTRACT(DOW FROM slot_start_ts) AS dow,
-                EXTRACT(HOUR FROM slot_start_ts) AS hr,
-                /* Time-of-day and weekend weighting */
-                CASE 
-                    WHEN EXTRACT(HOUR FROM slot_start_ts) BETWEEN 0 AND 5 THEN 1
-                    WHEN EXTRACT(HOUR FROM slot_start_ts) BETWEEN 6 AND 8 THEN 3
-                    WHEN EXTRACT(HOUR FROM slot_start_ts) BETWEEN 9 AND 12 THEN 4
-                    WHEN EXTRACT(HOUR FROM slot_start_ts) = 13 THEN 6
-                    WHEN EXTRACT(HOUR FROM slot_start_ts) BETWEEN 14 AND 17 THEN 4
-                    WHEN EXTRACT(HOUR FROM slot_start_ts) BETWEEN 18 AND 19 THEN 6
-                    WHEN EXTRACT(HOUR FROM slot_start_ts) = 20 THEN 8
-                    WHEN EXTRACT(HOUR FROM slot_start_ts) BETWEEN 21 AND 22 THEN 12
-                    WHEN EXTRACT(HOUR FROM slot_start_ts) = 23 THEN 4
-                    ELSE 3
-                END * (CASE WHEN EXTRACT(DOW FROM slot_start_ts) IN (0,6) THEN 1.2 ELSE 1 END) AS w
-            FROM slot_times
-        ),
-        slot_cap AS (
-            SELECT 
-                slot_index,
-                slot_start_ts,
-                /* base ~100, jitter, scale by weight and multiplier; floor at 20, cap at 600 */
-                LEAST(600, GREATEST(20, CAST(ROUND((100 + UNIFORM(0, 30, RANDOM())) * w * (SELECT sample_multiplier FROM params) / 10) AS INTEGER))) AS events_per_slot
-            FROM slot_weight
-        ),
-        events AS (
-            SELECT 
-                s.slot_index,
-                s.slot_start_ts,
-                ROW_NUMBER() OVER (PARTITION BY s.slot_index ORDER BY RANDOM()) AS event_seq
-            FROM slot_cap s
-            JOIN TABLE(GENERATOR(ROWCOUNT => 600)) g
-            QUALIFY event_seq <= s.events_per_slot
-        ),
-        /* Pre-sample a customer pool to map events deterministically */
-        cust_pool AS (
-            SELECT customer_id, ROW_NUMBER() OVER (ORDER BY RANDOM()) AS rn
+        WITH cust_pool AS (
+            SELECT customer_id, ROW_NUMBER() OVER (ORDER BY SEQ4()) AS rn
             FROM {CUSTOMER_TABLE}
             SAMPLE (2.5)
         ),
         pool_max AS (
             SELECT COALESCE(MAX(rn), 1) AS mx FROM cust_pool
-        ),
-        enriched AS (
-            SELECT 
-                /* Keys */
-                UUID_STRING() AS log_id,
-                'TF1' AS channel,
-                slot_start_ts AS slot_start_time,
-                DATEADD('second', UNIFORM(0, 1799, RANDOM()), slot_start_ts) AS event_time,
-                /* Stable programme id per slot */
-                'TF1-' || TO_CHAR(slot_start_ts, 'YYYYMMDD-HH24MI') AS programme_id,
-
-                /* Attach customer for ~30% */
-                CASE WHEN UNIFORM(0,1,RANDOM()) < (SELECT attach_customer_pct FROM params) THEN 1 ELSE 0 END AS attach_flag,
-                e.slot_index,
-                e.event_seq
-            FROM events e
-        ),
-        with_customer AS (
-            SELECT 
-                log_id,
-                channel,
-                slot_start_time,
-                event_time,
-                programme_id,
-                CASE WHEN attach_flag = 1 THEN cp.customer_id ELSE NULL END AS customer_id,
-                slot_index,
-                event_seq
-            FROM enriched
-            LEFT JOIN cust_pool cp
-              ON ((slot_index * 1000 + event_seq) % (SELECT mx FROM pool_max)) + 1 = cp.rn
-        ),
-        with_device1 AS (
-            SELECT 
-                log_id, channel, slot_start_time, event_time, programme_id, customer_id, slot_index, event_seq,
-                /* Deterministic ratios from slot/event */
-                (ABS(HASH(slot_index, event_seq)) % 1000) / 1000.0 AS r1,
-                (ABS(HASH(slot_index, event_seq, 1)) % 1000) / 1000.0 AS r2,
-                (ABS(HASH(slot_index, event_seq, 2)) % 1000) / 1000.0 AS r3,
-                (ABS(HASH(slot_index, event_seq, 3)) % 1000) / 1000.0 AS r4,
-                /* Device type by r1 */
-                CASE 
-                    WHEN (ABS(HASH(slot_index, event_seq)) % 1000) / 1000.0 < 0.45 THEN 'SmartTV'
-                    WHEN (ABS(HASH(slot_index, event_seq)) % 1000) / 1000.0 < 0.70 THEN 'Mobile'
-                    WHEN (ABS(HASH(slot_index, event_seq)) % 1000) / 1000.0 < 0.85 THEN 'Web'
-                    ELSE 'Tablet'
-                END AS device_type,
-                /* OS name driven by r1 (device bucket) and r2 */
-                CASE 
-                    WHEN (ABS(HASH(slot_index, event_seq)) % 1000) / 1000.0 < 0.45 THEN 
-                        CASE WHEN (ABS(HASH(slot_index, event_seq, 1)) % 1000) / 1000.0 < 0.5 THEN 'Tizen' 
-                             WHEN (ABS(HASH(slot_index, event_seq, 1)) % 1000) / 1000.0 < 0.8 THEN 'webOS' ELSE 'Android TV' END
-                    WHEN (ABS(HASH(slot_index, event_seq)) % 1000) / 1000.0 < 0.70 THEN 
-                        CASE WHEN (ABS(HASH(slot_index, event_seq, 1)) % 1000) / 1000.0 < 0.5 THEN 'Android' ELSE 'iOS' END
-                    WHEN (ABS(HASH(slot_index, event_seq)) % 1000) / 1000.0 < 0.85 THEN 'ChromeOS'
-                    ELSE 
-                        CASE WHEN (ABS(HASH(slot_index, event_seq, 1)) % 1000) / 1000.0 < 0.5 THEN 'Android' ELSE 'iPadOS' END
-                END AS os_name,
-                /* Connection type via r3 */
-                CASE WHEN (ABS(HASH(slot_index, event_seq, 2)) % 1000) / 1000.0 < 0.7 THEN 'wifi' 
-                     WHEN (ABS(HASH(slot_index, event_seq, 2)) % 1000) / 1000.0 < 0.9 THEN 'ethernet' ELSE 'cellular' END AS connection_type,
-                /* Bitrate and QoE */
-                CAST(800 + (ABS(HASH(slot_index, event_seq, 4)) % 5700)) AS bitrate_kbps,
-                CAST(ABS(HASH(slot_index, event_seq, 5)) % 6) AS buffer_events,
-                ROUND((ABS(HASH(slot_index, event_seq, 6)) % 80) / 1000.0, 3) AS rebuffer_ratio,
-                CAST(30 + (ABS(HASH(slot_index, event_seq, 7)) % 1770)) AS watch_seconds,
-                /* IP selection via deterministic hashing */
-                CASE 
-                    WHEN (ABS(HASH(slot_index, event_seq, 3)) % 1000) / 1000.0 < 0.4 THEN 
-                        '81.' || LPAD(CAST(48 + (ABS(HASH(slot_index, event_seq, 8)) % 16) AS STRING), 2, '0') || '.' || CAST(ABS(HASH(slot_index, event_seq, 9)) % 256 AS STRING) || '.' || CAST(ABS(HASH(slot_index, event_seq, 10)) % 256 AS STRING)
-                    WHEN (ABS(HASH(slot_index, event_seq, 3)) % 1000) / 1000.0 < 0.7 THEN 
-                        '82.' || LPAD(CAST(64 + (ABS(HASH(slot_index, event_seq, 8)) % 64) AS STRING), 3, '0') || '.' || CAST(ABS(HASH(slot_index, event_seq, 9)) % 256 AS STRING) || '.' || CAST(ABS(HASH(slot_index, event_seq, 10)) % 256 AS STRING)
-                    ELSE 
-                        '90.' || CAST(ABS(HASH(slot_index, event_seq, 8)) % 256 AS STRING) || '.' || CAST(ABS(HASH(slot_index, event_seq, 9)) % 256 AS STRING) || '.' || CAST(ABS(HASH(slot_index, event_seq, 10)) % 256 AS STRING)
-                END AS ip_address,
-                CASE 
-                    WHEN (ABS(HASH(slot_index, event_seq, 3)) % 1000) / 1000.0 < 0.4 THEN 'Orange'
-                    WHEN (ABS(HASH(slot_index, event_seq, 3)) % 1000) / 1000.0 < 0.7 THEN 'Free'
-                    ELSE 'Bouygues'
-                END AS isp,
-                'FR' AS country,
-                CASE MOD(slot_index, 6)
-                    WHEN 0 THEN 'Île-de-France'
-                    WHEN 1 THEN 'Auvergne-Rhône-Alpes'
-                    WHEN 2 THEN 'Provence-Alpes-Côte d''Azur'
-                    WHEN 3 THEN 'Nouvelle-Aquitaine'
-                    WHEN 4 THEN 'Occitanie'
-                    ELSE 'Hauts-de-France'
-                END AS region,
-                CASE MOD(event_seq, 6)
-                    WHEN 0 THEN 'Paris'
-                    WHEN 1 THEN 'Lyon'
-                    WHEN 2 THEN 'Marseille'
-                    WHEN 3 THEN 'Bordeaux'
-                    WHEN 4 THEN 'Toulouse'
-                    ELSE 'Lille'
-                END AS city,
-                CASE 
-                    WHEN (ABS(HASH(slot_index, event_seq, 11)) % 1000) / 1000.0 < 0.05 THEN 'play_start'
-                    WHEN (ABS(HASH(slot_index, event_seq, 11)) % 1000) / 1000.0 < 0.80 THEN 'play'
-                    WHEN (ABS(HASH(slot_index, event_seq, 11)) % 1000) / 1000.0 < 0.90 THEN 'pause'
-                    WHEN (ABS(HASH(slot_index, event_seq, 11)) % 1000) / 1000.0 < 0.97 THEN 'seek'
-                    ELSE 'play_end'
-                END AS event_type
-            FROM with_customer
-        ),
-        with_device AS (
-            SELECT 
-                log_id, channel, slot_start_time, event_time, programme_id, customer_id,
-                device_type, os_name, connection_type,
-                bitrate_kbps, buffer_events, rebuffer_ratio, watch_seconds,
-                /* Derived */
-                CAST(FLOOR(watch_seconds / 180) AS INTEGER) AS ad_breaks,
-                CAST(FLOOR(watch_seconds / 180) * 30 AS INTEGER) AS ad_total_seconds,
-                event_type,
-                ip_address, isp, country, region, city,
-                /* Semi-structured device details built from prior columns */
-                OBJECT_CONSTRUCT(
-                    'device_id', UUID_STRING(),
-                    'session_id', UUID_STRING(),
-                    'app_name', 'TF1+',
-                    'app_version', '1.' || CAST(ABS(HASH(log_id, 1)) % 10 AS STRING) || '.' || CAST(ABS(HASH(log_id, 2)) % 10 AS STRING),
-                    'player_version', '4.' || CAST(ABS(HASH(log_id, 3)) % 5 AS STRING),
-                    'resolution', CASE WHEN bitrate_kbps > 4000 THEN '1920x1080' WHEN bitrate_kbps > 2000 THEN '1280x720' ELSE '854x480' END,
-                    'drm', CASE WHEN os_name IN ('Android TV','Android','ChromeOS') THEN 'widevine' WHEN os_name IN ('iOS','iPadOS') THEN 'fairplay' ELSE 'playready' END,
-                    'manufacturer', CASE WHEN device_type='SmartTV' THEN 'Samsung' WHEN device_type='Mobile' THEN 'Apple' ELSE 'LG' END,
-                    'model', CASE WHEN device_type='SmartTV' THEN 'QE55' WHEN device_type='Mobile' THEN 'iPhone' ELSE 'web' END
-                ) AS device
-            FROM with_device1
         )
-        SELECT 
-            log_id,
-            channel,
-            event_time,
-            slot_start_time,
-            programme_id,
-            customer_id,
-            device_type,
-            os_name,
-            connection_type,
-            bitrate_kbps,
-            buffer_events,
-            rebuffer_ratio,
-            watch_seconds,
-            ad_breaks,
-            ad_total_seconds,
-            event_type,
-            ip_address,
-            isp,
-            country,
-            region,
-            city,
-            device
-        FROM with_device
+        SELECT
+            f.$1:LOG_ID::STRING AS log_id,
+            'TF1' AS channel,
+            f.$1:EVENT_TIME::TIMESTAMP_NTZ AS event_time,
+            f.$1:SLOT_START_TIME::TIMESTAMP_NTZ AS slot_start_time,
+            f.$1:PROGRAMME_ID::STRING AS programme_id,
+            cp.customer_id,
+            f.$1:DEVICE_TYPE::STRING AS device_type,
+            f.$1:OS_NAME::STRING AS os_name,
+            f.$1:CONNECTION_TYPE::STRING AS connection_type,
+            f.$1:BITRATE_KBPS::NUMBER AS bitrate_kbps,
+            f.$1:BUFFER_EVENTS::NUMBER AS buffer_events,
+            f.$1:REBUFFER_RATIO::FLOAT AS rebuffer_ratio,
+            f.$1:WATCH_SECONDS::NUMBER AS watch_seconds,
+            f.$1:AD_BREAKS::INTEGER AS ad_breaks,
+            f.$1:AD_TOTAL_SECONDS::INTEGER AS ad_total_seconds,
+            f.$1:EVENT_TYPE::STRING AS event_type,
+            f.$1:IP_ADDRESS::STRING AS ip_address,
+            f.$1:ISP::STRING AS isp,
+            'FR' AS country,
+            f.$1:REGION::STRING AS region,
+            f.$1:CITY::STRING AS city,
+            f.$1:DEVICE_ID::STRING AS device_id,
+            f.$1:SESSION_ID::STRING AS session_id,
+            f.$1:APP_VERSION::STRING AS app_version,
+            f.$1:PLAYER_VERSION::STRING AS player_version,
+            f.$1:RESOLUTION::STRING AS resolution,
+            f.$1:DRM::STRING AS drm,
+            f.$1:MANUFACTURER::STRING AS manufacturer,
+            f.$1:MODEL::STRING AS model
+        FROM @{LOAD_STAGE}/{file_name} (FILE_FORMAT => '{LOAD_FILE_FORMAT}') f
+        CROSS JOIN pool_max pm
+        LEFT JOIN cust_pool cp
+          ON cp.rn = IFF(f.$1:ATTACH_FLAG::BOOLEAN, (f.$1:POOL_KEY::INTEGER % pm.mx) + 1, NULL)
     """
 
-    if overwrite:
-        _exec(session, f"CREATE OR REPLACE TABLE {full_table} AS " + select_sql)
-    else:
-        _exec(session, f"CREATE TABLE IF NOT EXISTS {full_table} AS " + select_sql + " WHERE 1=0")
-        _exec(session, f"INSERT INTO {full_table} " + select_sql)
+    try:
+        _load(session, OUTPUT_TABLE, select_sql, VIEWING_LOG_COLUMNS, "slot_start_time, customer_id",
+              "slot_start_time, customer_id", DEVICE_VIEW_SELECT, overwrite)
+    finally:
+        # Never leave the staged file behind, even when the load fails
+        exec_sql(session, f"REMOVE @{LOAD_STAGE}/{file_name}")
 
-    return session.sql(f"SELECT * FROM {full_table} SAMPLE (100 ROWS)")
+    return session.sql(f"SELECT * FROM {TARGET_DB}.{RAW_SCHEMA}.{OUTPUT_TABLE} LIMIT 100")
 
 
 def sp_entry(
@@ -290,11 +574,20 @@ def sp_entry(
     sample_multiplier: Optional[int] = None,
     attach_customer_pct: Optional[float] = None,
     overwrite: bool = True,
+    mode: Optional[str] = None,
+    total_events: Optional[int] = None,
 ):
     if sample_multiplier is None:
         sample_multiplier = 1
     if attach_customer_pct is None:
         attach_customer_pct = 0.30
-    return run(session, sample_multiplier=sample_multiplier, attach_customer_pct=attach_customer_pct, overwrite=overwrite)
-
-
+    if mode is None:
+        mode = "weekly"
+    return run(
+        session,
+        sample_multiplier=sample_multiplier,
+        attach_customer_pct=attach_customer_pct,
+        overwrite=overwrite,
+        mode=mode,
+        total_events=total_events,
+    )
@@ -0,0 +1,176 @@
+"""
+Local event synthesis for tf1_viewing_logs_generator's "weekly" mode.
+
+Events are generated with NumPy/Arrow and staged as one Parquet file; the generator
+imports this module only for that mode, so the SQL modes need no numpy or pyarrow.
+"""
+
+from datetime import date
+import uuid
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from snowflake.snowpark import Session
+
+from sf1plus_staging import lookup, stage_parquet, to_str
+from tf1_viewing_logs_generator import (
+    CITIES, CONNECTION_TYPES, DEVICE_TYPES, ISPS, REGIONS, SIMPLE_MANUFACTURERS, SIMPLE_MODELS,
+)
+
+
+SLOT_COUNT = 336  # 7 days * 48 half-hour slots
+
+# Time-of-day weighting by hour (0-23)
+HOUR_WEIGHTS = np.array([1, 1, 1, 1, 1, 1, 3, 3, 3, 4, 4, 4, 4, 6, 4, 4, 4, 4, 6, 6, 8, 12, 12, 4])
+
+# OS by device type (rows) and r_os bucket < 500 / < 800 / rest (columns)
+OS_NAMES = [
+    "Tizen", "webOS", "Android TV",
+    "Android", "iOS", "iOS",
+    "ChromeOS", "ChromeOS", "ChromeOS",
+    "Android", "iPadOS", "iPadOS",
+]
+# DRM by OS, in the same device-type x r_os bucket layout
+DRMS = [
+    "playready", "playready", "widevine",
+    "widevine", "fairplay", "fairplay",
+    "widevine", "widevine", "widevine",
+    "widevine", "fairplay", "fairplay",
+]
+IP_PREFIXES = ["81", "82", "90"]
+EVENT_TYPES = ["play_start", "play", "pause", "seek", "play_end"]
+HEX_DIGITS = np.array(list("0123456789abcdef"))
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer: cheap, well-distributed 64-bit hash of uint64 keys."""
+    z = x + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _hex_ids(keys: np.ndarray, salt: int) -> np.ndarray:
+    """Deterministic 32-hex-char ids for `keys`; `salt` separates id kinds (log, device, ...)."""
+    h1 = _mix64(keys.astype(np.uint64) * np.uint64(8) + np.uint64(salt))
+    h2 = _mix64(h1)
+    shifts = np.arange(60, -4, -4, dtype=np.uint64)
+    nibbles = np.concatenate(
+        [(h1[:, None] >> shifts) & np.uint64(0xF), (h2[:, None] >> shifts) & np.uint64(0xF)], axis=1
+    )
+    return np.ascontiguousarray(HEX_DIGITS[nibbles]).view("<U32").ravel()
+
+
+def generate_events(week_start: date, sample_multiplier: int, attach_pct: float) -> pa.Table:
+    """
+    Synthesize the week of viewing events starting at `week_start` as an Arrow table.
+
+    customer_id is resolved in Snowflake: ATTACH_FLAG marks the ~attach_pct events
+    that get a customer and POOL_KEY is cycled through the sampled customer pool.
+    """
+    rng = np.random.default_rng()
+
+    slot_index = np.arange(SLOT_COUNT)
+    slot_start = np.datetime64(week_start, "m") + slot_index * np.timedelta64(30, "m")
+    hr = (slot_index // 2) % 24
+    weekend = (slot_index // 48) >= 5
+    w = HOUR_WEIGHTS[hr] * np.where(weekend, 1.2, 1.0)
+
+    # base ~100, jitter, scale by weight and multiplier; floor at 20, cap at 600
+    jitter = rng.integers(0, 31, size=SLOT_COUNT)
+    events_per_slot = np.clip(np.floor((100 + jitter) * w * sample_multiplier / 10 + 0.5), 20, 600).astype(np.int64)
+
+    # Events: exactly events_per_slot rows per slot, event_seq 1..n within the slot
+    ev_slot = np.repeat(slot_index, events_per_slot)
+    slot_offsets = np.repeat(np.cumsum(events_per_slot) - events_per_slot, events_per_slot)
+    event_seq = np.arange(ev_slot.size) - slot_offsets + 1
+    n = ev_slot.size
+
+    # Per-event key: a random 60-bit run salt keeps ids disjoint across runs,
+    # so appended weekly runs (overwrite=False) never repeat a log_id
+    pool_key = ev_slot * 1000 + event_seq
+    run_salt = np.uint64(uuid.uuid4().int >> 68)
+    event_key = run_salt + pool_key.astype(np.uint64)
+
+    slot_start_time = slot_start[ev_slot].astype("datetime64[s]")
+    event_time = slot_start_time + rng.integers(0, 1800, size=n).astype("timedelta64[s]")
+    programme_ids = np.array(
+        ["TF1-" + ts.astype(object).strftime("%Y%m%d-%H%M") for ts in slot_start]
+    )
+
+    # One draw (0-999) per categorical decision
+    r_dev = rng.integers(0, 1000, size=n)
+    r_os = rng.integers(0, 1000, size=n)
+    r_conn = rng.integers(0, 1000, size=n)
+    r_ip = rng.integers(0, 1000, size=n)
+    r_evt = rng.integers(0, 1000, size=n)
+
+    dev_idx = np.searchsorted([450, 700, 850], r_dev, side="right")
+    os_idx = dev_idx * 3 + np.searchsorted([500, 800], r_os, side="right")
+    isp_idx = np.searchsorted([400, 700], r_ip, side="right")
+    device_type = lookup(DEVICE_TYPES, dev_idx)
+    os_name = lookup(OS_NAMES, os_idx)
+
+    # Bitrate and QoE
+    bitrate_kbps = 800 + rng.integers(0, 5700, size=n)
+    watch_seconds = 30 + rng.integers(0, 1770, size=n)
+    ad_breaks = watch_seconds // 180
+
+    # IP by ISP range: 81.48-63.x.x (Orange), 82.064-127.x.x (Free), 90.x.x.x (Bouygues)
+    h_oct2 = rng.integers(0, 1 << 16, size=n)
+    oct2 = np.select([isp_idx == 0, isp_idx == 1], [48 + h_oct2 % 16, 64 + h_oct2 % 64], h_oct2 % 256)
+    oct2_str = to_str(oct2)
+    oct2_str = pc.if_else(pa.array(isp_idx == 1), pc.utf8_lpad(oct2_str, 3, padding="0"), oct2_str)
+    ip_address = pc.binary_join_element_wise(
+        lookup(IP_PREFIXES, isp_idx),
+        oct2_str,
+        to_str(rng.integers(0, 256, size=n)),
+        to_str(rng.integers(0, 256, size=n)),
+        ".",
+    )
+
+    # Device details (assembled into the `device` VARIANT by the _V view)
+    resolution_idx = np.searchsorted([2000, 4000], bitrate_kbps, side="left")
+
+    return pa.table({
+        "LOG_ID": pa.array(_hex_ids(event_key, 0)),
+        "EVENT_TIME": pa.array(event_time),
+        "SLOT_START_TIME": pa.array(slot_start_time),
+        "PROGRAMME_ID": pa.array(programme_ids[ev_slot]),
+        "ATTACH_FLAG": pa.array(rng.random(n) < attach_pct),
+        "POOL_KEY": pa.array(pool_key),
+        "DEVICE_TYPE": device_type,
+        "OS_NAME": os_name,
+        "CONNECTION_TYPE": lookup(CONNECTION_TYPES, np.searchsorted([700, 900], r_conn, side="right")),
+        "BITRATE_KBPS": pa.array(bitrate_kbps),
+        "BUFFER_EVENTS": pa.array(rng.integers(0, 6, size=n)),
+        "REBUFFER_RATIO": pa.array(np.round(rng.integers(0, 80, size=n) / 1000.0, 3)),
+        "WATCH_SECONDS": pa.array(watch_seconds),
+        "AD_BREAKS": pa.array(ad_breaks),
+        "AD_TOTAL_SECONDS": pa.array(ad_breaks * 30),
+        "EVENT_TYPE": lookup(EVENT_TYPES, np.searchsorted([50, 800, 900, 970], r_evt, side="right")),
+        "IP_ADDRESS": ip_address,
+        "ISP": lookup(ISPS, isp_idx),
+        "REGION": lookup(REGIONS, ev_slot % 6),
+        "CITY": lookup(CITIES, event_seq % 6),
+        "DEVICE_ID": pa.array(_hex_ids(event_key, 1)),
+        "SESSION_ID": pa.array(_hex_ids(event_key, 2)),
+        "APP_VERSION": pc.binary_join_element_wise(
+            "1", to_str(rng.integers(0, 10, size=n)), to_str(rng.integers(0, 10, size=n)), "."
+        ),
+        "PLAYER_VERSION": pc.binary_join_element_wise("4.", to_str(rng.integers(0, 5, size=n)), ""),
+        "RESOLUTION": lookup(["854x480", "1280x720", "1920x1080"], resolution_idx),
+        "DRM": lookup(DRMS, os_idx),
+        "MANUFACTURER": lookup(SIMPLE_MANUFACTURERS, dev_idx),
+        "MODEL": lookup(SIMPLE_MODELS, dev_idx),
+    })
+
+
+def stage_events(session: Session, stage: str, sample_multiplier: int, attach_pct: float) -> str:
+    """Generate the current week of events and stage them as Parquet; returns the staged file name."""
+    # Week start from the session clock and timezone, as the SQL modes use it
+    week_start = session.sql("SELECT DATE_TRUNC('WEEK', CURRENT_DATE())").collect()[0][0]
+    events = generate_events(week_start, sample_multiplier, attach_pct)
+    return stage_parquet(session, events, stage, "tf1_viewing_logs")
@@ -4,7 +4,9 @@ Streamlit app for visualizing SF1+ streaming platform analytics
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -38,30 +40,213 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+@st.cache_resource
 def get_snowflake_connection():
-    """Create Snowflake connection (configure with your credentials)"""
+    """Create Snowflake connection (configure with your credentials), shared across reruns"""
     return snowflake.connector.connect(
         user=os.getenv('SNOWFLAKE_USER', 'your_user'),
         password=os.getenv('SNOWFLAKE_PASSWORD', 'your_password'),
         account=os.getenv('SNOWFLAKE_ACCOUNT', 'your_account'),
         warehouse=os.getenv('SNOWFLAKE_WAREHOUSE', 'your_warehouse'),
         database='SF1PLUS_DB',
-        schema='GOLD'
+        schema='GOLD',
+        client_session_keep_alive=True,
+        paramstyle='qmark'  # server-side binds: one query text per query, whatever the values
     )
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def run_query(query):
-    """Execute query and return DataFrame"""
-    try:
+def get_connection():
+    """The cached connection, reconnecting once if the session was dropped"""
+    conn = get_snowflake_connection()
+    if conn.is_closed():
+        get_snowflake_connection.clear()
         conn = get_snowflake_connection()
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
+    return conn
+
+# Cached fetches let errors escape (st.cache_data never caches an exception);
+# the run_* wrappers below report them without caching an empty result
+
+@st.cache_data(ttl=3600)  # GOLD aggregates only change when the analytics layer is rebuilt
+def fetch_query(query, params=None):
+    """Execute query (with optional bind values) and return DataFrame"""
+    cur = get_connection().cursor()
+    try:
+        cur.execute(query, params)
+        # Arrow result batches go straight into pandas, without a row-tuple intermediate
+        return cur.fetch_pandas_all()
+    finally:
+        cur.close()
+
+@st.cache_data(ttl=3600)
+def fetch_arrow_query(query, params=None):
+    """Execute query and return the Arrow table as fetched, for display-only results"""
+    cur = get_connection().cursor()
+    try:
+        cur.execute(query, params)
+        table = cur.fetch_arrow_all()
+        # fetch_arrow_all returns None when the result has no rows
+        return table if table is not None else pa.table({})
+    finally:
+        cur.close()
+
+@st.cache_data(ttl=3600)
+def fetch_queries_parallel(queries):
+    """Submit independent queries at once and return their Arrow tables, in order"""
+    conn = get_connection()
+    cursors = []
+    try:
+        # execute_async returns as soon as Snowflake has the query, so the
+        # queries run concurrently and we only wait for the slowest one
+        for query in queries:
+            cur = conn.cursor()
+            cursors.append(cur)
+            cur.execute_async(query)
+        
+        tables = []
+        for cur in cursors:
+            cur.get_results_from_sfqid(cur.sfqid)
+            table = cur.fetch_arrow_all()
+            tables.append(table if table is not None else pa.table({}))
+        return tables
+    finally:
+        for cur in cursors:
+            cur.close()
+
+# Snowflake error code for "Authentication token has expired"
+SESSION_EXPIRED_ERRNO = 390114
+
+def is_connection_failure(e):
+    """True for a lost connection or an expired session, not for an error in the query itself"""
+    return (isinstance(e, snowflake.connector.errors.OperationalError)
+            or getattr(e, 'errno', None) == SESSION_EXPIRED_ERRNO)
+
+def reset_connection():
+    """Close the cached connection (stopping its keep-alive heartbeat) and drop it from the cache"""
+    try:
+        get_snowflake_connection().close()
+    except Exception:
+        pass
+    get_snowflake_connection.clear()
+
+def call_with_reconnect(fetch, *args):
+    """Run a cached fetch; on a connection or session-expiry failure that the
+    connection does not report as closed, reconnect and retry once"""
+    try:
+        return fetch(*args)
+    except snowflake.connector.errors.DatabaseError as e:
+        if not is_connection_failure(e):
+            raise
+        reset_connection()
+        return fetch(*args)
+
+def run_query(query, params=None):
+    """fetch_query, showing errors instead of raising"""
+    try:
+        return call_with_reconnect(fetch_query, query, params)
     except Exception as e:
         st.error(f"Database connection error: {str(e)}")
         return pd.DataFrame()
 
+def run_arrow_query(query, params=None):
+    """fetch_arrow_query, showing errors instead of raising"""
+    try:
+        return call_with_reconnect(fetch_arrow_query, query, params)
+    except Exception as e:
+        st.error(f"Database connection error: {str(e)}")
+        return pa.table({})
+
+def run_queries_parallel(queries):
+    """fetch_queries_parallel; if any query fails, fall back to one run_arrow_query per query"""
+    try:
+        return call_with_reconnect(fetch_queries_parallel, queries)
+    except Exception:
+        # Failures are then reported per query, and the queries that succeed still render
+        return [run_arrow_query(query) for query in queries]
+
+def clear_query_caches():
+    """Drop cached query results only; the cached connection stays open"""
+    fetch_query.clear()
+    fetch_arrow_query.clear()
+    fetch_queries_parallel.clear()
+
+def load_daily_summary(date_days):
+    """DAILY_SUMMARY rows for the last date_days days (all rows if None), shared by every tab"""
+    # The day count is a bind variable, so every range shares one compiled
+    # query text ("All time" simply drops the filter)
+    date_filter = "WHERE summary_date >= DATEADD(day, -?, CURRENT_DATE())" if date_days else ""
+    return run_query(f"""
+        SELECT 
+            summary_date,
+            total_events,
+            unique_viewers,
+            total_watch_hours,
+            total_ad_minutes,
+            avg_bitrate,
+            avg_buffer_events,
+            avg_rebuffer_ratio,
+            identified_viewer_rate
+        FROM DAILY_SUMMARY 
+        {date_filter}
+        ORDER BY summary_date
+    """, (date_days,) if date_days else None)
+
+def load_device_analytics():
+    """DEVICE_ANALYTICS rows (one per device/OS/connection), shared by the Overview and Devices views"""
+    return run_query("""
+        SELECT 
+            device_type,
+            os_name,
+            connection_type,
+            total_events,
+            unique_users,
+            avg_bitrate,
+            avg_buffer_events,
+            avg_rebuffer_ratio
+        FROM DEVICE_ANALYTICS 
+    """)
+
+# Heatmap rows, in week order (matches PEAK_TIMES_ANALYTICS day names)
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Small summary charts need no pan/zoom/hover: render them as static images
+STATIC_CHART_CONFIG = {'staticPlot': True, 'displayModeBar': False}
+
+# Line charts never need more points than a chart is pixels wide
+MAX_CHART_POINTS = 1000
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual shape of (x, y)"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    # n_out - 2 buckets between the fixed first and last points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        nxt_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:nxt_end].mean(), y[end:nxt_end].mean()
+        # Keep the bucket point forming the largest triangle with the last kept point
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+def downsample(df, x, y, max_points=MAX_CHART_POINTS):
+    """LTTB-downsample a time series DataFrame on column y, keeping whole rows"""
+    if len(df) <= max_points:
+        return df
+    xs = pd.to_datetime(df[x]).astype('int64').to_numpy(dtype=float)
+    ys = df[y].to_numpy(dtype=float)
+    return df.iloc[lttb_indices(xs, ys, max_points)]
+
+def plot_frame(df, x, y):
+    """Chart-ready rows of df: downsampled on y, float columns narrowed to float32 for the browser payload"""
+    out = downsample(df, x, y)
+    return out.astype({c: 'float32' for c in out.select_dtypes('float64').columns})
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">📺 SF1+ Analytics Dashboard</h1>', unsafe_allow_html=True)
@@ -77,130 +262,120 @@ def main():
         index=1
     )
     
-    # Convert to SQL filter
-    date_filter = {
-        "Last 7 days": "AND summary_date >= CURRENT_DATE() - 7",
-        "Last 30 days": "AND summary_date >= CURRENT_DATE() - 30", 
-        "Last 90 days": "AND summary_date >= CURRENT_DATE() - 90",
-        "All time": ""
+    # Convert to a day count for the DAILY_SUMMARY filter
+    date_days = {
+        "Last 7 days": 7,
+        "Last 30 days": 30, 
+        "Last 90 days": 90,
+        "All time": None
     }[date_range]
     
-    # Refresh button
-    if st.sidebar.button("🔄 Refresh Data"):
-        st.cache_data.clear()
-        st.rerun()
+    # Refresh button: the click itself triggers the rerun, after the callback
+    st.sidebar.button("🔄 Refresh Data", on_click=clear_query_caches)
     
-    # Main dashboard
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "👥 Customers", "📺 Content", "📱 Devices"])
+    # Main dashboard: st.tabs would run every tab body (and its queries) on each
+    # rerun, so the active view is picked with a radio and only that body runs
+    view = st.radio(
+        "View",
+        ["📊 Overview", "👥 Customers", "📺 Content", "📱 Devices"],
+        horizontal=True,
+        key="active_view",
+        label_visibility="collapsed"
+    )
     
-    with tab1:
+    if view == "📊 Overview":
         st.header("Platform Overview")
         
-        # Key metrics
-        metrics_query = f"""
-        SELECT 
-            SUM(total_events) as total_events,
-            SUM(unique_viewers) as total_viewers,
-            SUM(total_watch_hours) as total_watch_hours,
-            AVG(avg_bitrate) as avg_bitrate,
-            AVG(identified_viewer_rate) as id_rate
-        FROM DAILY_SUMMARY 
-        WHERE 1=1 {date_filter}
-        """
-        
-        metrics_df = run_query(metrics_query)
+        # One daily summary fetch feeds the key metrics (rolled up in pandas),
+        # the daily trend charts and the Devices tab quality charts
+        daily_df = load_daily_summary(date_days)
         
-        if not metrics_df.empty:
+        # Key metrics
+        if not daily_df.empty:
+            metrics = {
+                'TOTAL_EVENTS': daily_df['TOTAL_EVENTS'].sum(),
+                'TOTAL_VIEWERS': daily_df['UNIQUE_VIEWERS'].sum(),
+                'TOTAL_WATCH_HOURS': daily_df['TOTAL_WATCH_HOURS'].sum(),
+                'AVG_BITRATE': daily_df['AVG_BITRATE'].mean(),
+                'ID_RATE': daily_df['IDENTIFIED_VIEWER_RATE'].mean(),
+            }
+            
             col1, col2, col3, col4, col5 = st.columns(5)
             
             with col1:
                 st.metric(
                     "Total Events",
-                    f"{metrics_df['TOTAL_EVENTS'].iloc[0]:,.0f}",
+                    f"{metrics['TOTAL_EVENTS']:,.0f}",
                     help="Total streaming events"
                 )
             
             with col2:
                 st.metric(
                     "Unique Viewers", 
-                    f"{metrics_df['TOTAL_VIEWERS'].iloc[0]:,.0f}",
+                    f"{metrics['TOTAL_VIEWERS']:,.0f}",
                     help="Distinct customers who watched content"
                 )
             
             with col3:
                 st.metric(
                     "Watch Hours",
-                    f"{metrics_df['TOTAL_WATCH_HOURS'].iloc[0]:,.0f}",
+                    f"{metrics['TOTAL_WATCH_HOURS']:,.0f}",
                     help="Total hours of content consumed"
                 )
             
             with col4:
                 st.metric(
                     "Avg Bitrate",
-                    f"{metrics_df['AVG_BITRATE'].iloc[0]:,.0f} kbps",
+                    f"{metrics['AVG_BITRATE']:,.0f} kbps",
                     help="Average streaming quality"
                 )
             
             with col5:
                 st.metric(
                     "ID Rate",
-                    f"{metrics_df['ID_RATE'].iloc[0]:.1%}",
+                    f"{metrics['ID_RATE']:.1%}",
                     help="% of events with customer ID"
                 )
         
         # Daily trends
-        daily_query = f"""
-        SELECT 
-            summary_date,
-            unique_viewers,
-            total_watch_hours,
-            total_ad_minutes,
-            avg_bitrate
-        FROM DAILY_SUMMARY 
-        WHERE 1=1 {date_filter}
-        ORDER BY summary_date
-        """
-        
-        daily_df = run_query(daily_query)
-        
         if not daily_df.empty:
             col1, col2 = st.columns(2)
             
             with col1:
                 fig_viewers = px.line(
-                    daily_df, 
+                    plot_frame(daily_df, 'SUMMARY_DATE', 'UNIQUE_VIEWERS'),
                     x='SUMMARY_DATE', 
                     y='UNIQUE_VIEWERS',
                     title='Daily Unique Viewers',
-                    labels={'UNIQUE_VIEWERS': 'Unique Viewers', 'SUMMARY_DATE': 'Date'}
+                    labels={'UNIQUE_VIEWERS': 'Unique Viewers', 'SUMMARY_DATE': 'Date'},
+                    render_mode='webgl'
                 )
                 fig_viewers.update_layout(height=400)
                 st.plotly_chart(fig_viewers, use_container_width=True)
             
             with col2:
                 fig_hours = px.line(
-                    daily_df,
+                    plot_frame(daily_df, 'SUMMARY_DATE', 'TOTAL_WATCH_HOURS'),
                     x='SUMMARY_DATE',
                     y='TOTAL_WATCH_HOURS', 
                     title='Daily Watch Hours',
-                    labels={'TOTAL_WATCH_HOURS': 'Watch Hours', 'SUMMARY_DATE': 'Date'}
+                    labels={'TOTAL_WATCH_HOURS': 'Watch Hours', 'SUMMARY_DATE': 'Date'},
+                    render_mode='webgl'
                 )
                 fig_hours.update_layout(height=400)
                 st.plotly_chart(fig_hours, use_container_width=True)
         
-        # Device distribution
-        device_query = """
-        SELECT 
-            device_type,
-            SUM(total_events) as events,
-            COUNT(DISTINCT unique_users) as users,
-            AVG(avg_bitrate) as bitrate
-        FROM DEVICE_ANALYTICS 
-        GROUP BY device_type
-        ORDER BY events DESC
-        """
-        
-        device_df = run_query(device_query)
+        # Device distribution, rolled up per device type from the shared DEVICE_ANALYTICS load
+        devices_df = load_device_analytics()
+        device_df = (
+            devices_df.groupby('DEVICE_TYPE', as_index=False)
+            .agg(
+                EVENTS=('TOTAL_EVENTS', 'sum'),
+                USERS=('UNIQUE_USERS', 'nunique'),
+                BITRATE=('AVG_BITRATE', 'mean')
+            )
+            .sort_values('EVENTS', ascending=False)
+        ) if not devices_df.empty else devices_df
         
         if not device_df.empty:
             col1, col2 = st.columns(2)
@@ -212,7 +387,7 @@ def main():
                     names='DEVICE_TYPE',
                     title='Events by Device Type'
                 )
-                st.plotly_chart(fig_pie, use_container_width=True)
+                st.plotly_chart(fig_pie, use_container_width=True, config=STATIC_CHART_CONFIG)
             
             with col2:
                 fig_bar = px.bar(
@@ -222,9 +397,9 @@ def main():
                     title='Average Bitrate by Device',
                     labels={'BITRATE': 'Avg Bitrate (kbps)', 'DEVICE_TYPE': 'Device Type'}
                 )
-                st.plotly_chart(fig_bar, use_container_width=True)
+                st.plotly_chart(fig_bar, use_container_width=True, config=STATIC_CHART_CONFIG)
     
-    with tab2:
+    if view == "👥 Customers":
         st.header("Customer Analytics")
         
         # Customer segments
@@ -268,103 +443,116 @@ def main():
         
         # Top customers table
         st.subheader("Top Customers by Engagement")
-        top_customers_df = run_query("SELECT * FROM TOP_CUSTOMERS LIMIT 20")
+        top_customers = run_arrow_query("""
+            SELECT 
+                customer_id,
+                first_name,
+                last_name,
+                subscription_level,
+                engagement_score,
+                total_watch_hours,
+                preferred_device,
+                region
+            FROM TOP_CUSTOMERS 
+            ORDER BY engagement_score DESC
+            LIMIT 20
+        """)
         
-        if not top_customers_df.empty:
-            st.dataframe(
-                top_customers_df[['CUSTOMER_ID', 'FIRST_NAME', 'LAST_NAME', 'SUBSCRIPTION_LEVEL', 
-                                'ENGAGEMENT_SCORE', 'TOTAL_WATCH_HOURS', 'PREFERRED_DEVICE', 'REGION']],
-                use_container_width=True
-            )
+        if top_customers.num_rows:
+            st.dataframe(top_customers, use_container_width=True)
     
-    with tab3:
+    if view == "📺 Content":
         st.header("Content Performance")
         
+        # Programme ranking and peak hours are independent: submit both, then collect the results
+        programmes, peak = run_queries_parallel(("""
+            SELECT 
+                programme_id,
+                programme_date,
+                programme_hour,
+                unique_viewers,
+                total_watch_hours,
+                completion_rate,
+                top_region
+            FROM TOP_PROGRAMMES 
+            ORDER BY unique_viewers DESC
+            LIMIT 20
+        """, """
+            SELECT viewing_hour, day_name, avg_unique_viewers
+            FROM PEAK_HOURS 
+            ORDER BY avg_unique_viewers DESC
+            LIMIT 24
+        """))
+        
         # Programme performance
         st.subheader("Top Programmes (Last 7 Days)")
-        prog_df = run_query("SELECT * FROM TOP_PROGRAMMES LIMIT 20")
-        
-        if not prog_df.empty:
-            st.dataframe(
-                prog_df[['PROGRAMME_ID', 'PROGRAMME_DATE', 'PROGRAMME_HOUR', 
-                        'UNIQUE_VIEWERS', 'TOTAL_WATCH_HOURS', 'COMPLETION_RATE', 'TOP_REGION']],
-                use_container_width=True
-            )
+        if programmes.num_rows:
+            st.dataframe(programmes, use_container_width=True)
         
         # Peak hours analysis
         st.subheader("Peak Viewing Hours")
-        peak_df = run_query("SELECT * FROM PEAK_HOURS ORDER BY avg_unique_viewers DESC LIMIT 24")
+        peak_df = peak.to_pandas()
         
         if not peak_df.empty:
-            fig_heatmap = px.density_heatmap(
-                peak_df,
-                x='VIEWING_HOUR',
-                y='DAY_NAME', 
-                z='AVG_UNIQUE_VIEWERS',
+            # PEAK_HOURS is already aggregated per (day, hour): pivot it into a
+            # fixed 7x24 grid here rather than having plotly.js re-bin long-form rows
+            peak_grid = (
+                peak_df.pivot(index='DAY_NAME', columns='VIEWING_HOUR', values='AVG_UNIQUE_VIEWERS')
+                .reindex(index=DAY_NAMES, columns=range(24))
+            )
+            fig_heatmap = go.Figure(go.Heatmap(
+                z=peak_grid.to_numpy(dtype='float32'),
+                x=peak_grid.columns,
+                y=peak_grid.index,
+                colorbar={'title': 'Avg Viewers'},
+                hoverongaps=False
+            ))
+            fig_heatmap.update_layout(
                 title='Viewing Patterns by Hour and Day',
-                labels={'AVG_UNIQUE_VIEWERS': 'Avg Viewers', 'VIEWING_HOUR': 'Hour of Day'}
+                xaxis_title='Hour of Day',
+                yaxis_title='Day'
             )
             st.plotly_chart(fig_heatmap, use_container_width=True)
     
-    with tab4:
+    if view == "📱 Devices":
         st.header("Device & Technical Analytics")
         
         # Device performance table
         st.subheader("Device Performance Summary")
-        device_detail_df = run_query("""
-            SELECT 
-                device_type,
-                os_name,
-                connection_type,
-                total_events,
-                unique_users,
-                avg_bitrate,
-                avg_buffer_events,
-                avg_rebuffer_ratio
-            FROM DEVICE_ANALYTICS 
-            ORDER BY total_events DESC
-            LIMIT 20
-        """)
-        
-        if not device_detail_df.empty:
-            st.dataframe(device_detail_df, use_container_width=True)
+        devices_df = load_device_analytics()
         
-        # Quality metrics
-        quality_query = f"""
-        SELECT 
-            summary_date,
-            avg_bitrate,
-            avg_buffer_events,
-            avg_rebuffer_ratio
-        FROM DAILY_SUMMARY 
-        WHERE 1=1 {date_filter}
-        ORDER BY summary_date
-        """
+        if not devices_df.empty:
+            st.dataframe(devices_df.nlargest(20, 'TOTAL_EVENTS'), use_container_width=True, hide_index=True)
         
-        quality_df = run_query(quality_query)
+        # Quality metrics (same cached daily summary as the Overview tab)
+        quality_df = load_daily_summary(date_days)
         
         if not quality_df.empty:
+            # One column of stacked panels sharing the date axis: panning one pans all
             fig_quality = make_subplots(
-                rows=2, cols=2,
-                subplot_titles=('Average Bitrate', 'Buffer Events', 'Rebuffer Ratio', 'Quality Trend'),
-                specs=[[{"secondary_y": False}, {"secondary_y": False}],
-                       [{"secondary_y": False}, {"secondary_y": False}]]
+                rows=3, cols=1,
+                shared_xaxes=True,
+                subplot_titles=('Average Bitrate', 'Buffer Events', 'Rebuffer Ratio')
             )
             
+            q = plot_frame(quality_df, 'SUMMARY_DATE', 'AVG_BITRATE')
             fig_quality.add_trace(
-                go.Scatter(x=quality_df['SUMMARY_DATE'], y=quality_df['AVG_BITRATE'], name='Bitrate'),
+                go.Scattergl(x=q['SUMMARY_DATE'], y=q['AVG_BITRATE'], name='Bitrate'),
                 row=1, col=1
             )
+            q = plot_frame(quality_df, 'SUMMARY_DATE', 'AVG_BUFFER_EVENTS')
             fig_quality.add_trace(
-                go.Scatter(x=quality_df['SUMMARY_DATE'], y=quality_df['AVG_BUFFER_EVENTS'], name='Buffer Events'),
-                row=1, col=2
+                go.Scattergl(x=q['SUMMARY_DATE'], y=q['AVG_BUFFER_EVENTS'], name='Buffer Events'),
+                row=2, col=1
             )
+            q = plot_frame(quality_df, 'SUMMARY_DATE', 'AVG_REBUFFER_RATIO')
             fig_quality.add_trace(
-                go.Scatter(x=quality_df['SUMMARY_DATE'], y=quality_df['AVG_REBUFFER_RATIO'], name='Rebuffer Ratio'),
-                row=2, col=1
+                go.Scattergl(x=q['SUMMARY_DATE'], y=q['AVG_REBUFFER_RATIO'], name='Rebuffer Ratio'),
+                row=3, col=1
             )
             
-            fig_quality.update_layout(height=600, title_text="Streaming Quality Metrics")
+            # uirevision keeps the user's zoom/pan across reruns instead of resetting the layout
+            fig_quality.update_layout(height=600, title_text="Streaming Quality Metrics", uirevision='quality')
             st.plotly_chart(fig_quality, use_container_width=True)
     
     # Footer